@@ -1,423 +1,496 @@
-from collections import Counter
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
-import pandas as pd
+import numpy as np
 
-from src.analysis.metrics import calculate_btc_days
-from src.analysis.plotting import plot_comparison
 from src.config import ARK_POOL_CAPACITY, SimulationConfig
 from src.engines.ark_engine import ArkEngine
 from src.engines.legacy_engine import LegacyEngine
 from src.engines.legacy_refill_engine import LegacyRefillEngine
 from src.engines.passthrough_engine import PassthroughEngine
-from src.models import Transaction, TransactionType, User, UserType
-from src.simulation.runner import SimulationResult, SimulationRunner
-from src.traffic.traffic_generator import TrafficGenerator
+from src.models import (
+    TRANSACTION_TYPE_VALUES,
+    TRANSACTION_TYPES,
+    USER_TYPE_VALUES,
+    USER_TYPES,
+    TransactionBatch,
+    UserPopulation,
+)
+from src.simulation.parallel import EngineFactory, run_engines
+from src.simulation.runner import SimulationResult
+from src.traffic.traffic_cache import load_or_generate_traffic
 from src.traffic.user_generator import generate_users
 
 
 SATS_PER_BTC: int = 100_000_000
 DATA_DIR: Path = Path("data")
 TRAFFIC_CSV_PATH: Path = DATA_DIR / "traffic_seed.csv"
+TRAFFIC_PARQUET_PATH: Path = DATA_DIR / "traffic_seed.parquet"
 OUTPUT_DIR: Path = Path("output")
 
+# Table rules, built once rather than on every report call
+RULE_40: str = "=" * 40
+SUBRULE_40: str = "-" * 40
+RULE_50: str = "=" * 50
+SUBRULE_50: str = "-" * 50
+RULE_70: str = "=" * 70
+SUBRULE_70: str = "-" * 70
+RULE_80: str = "=" * 80
+SUBRULE_80: str = "-" * 80
+
+# Row template for the capital efficiency table
+_EFFICIENCY_ROW_FMT: str = (
+    "{name:<16} {success_pct:>13.1f}% {btc_days:>16} {op_fees:>18} {score:>10.1f}"
+)
+
+# Enum values resolved once; indexed by ordinal code to decode whole columns
+_TX_TYPE_VALUES: np.ndarray = np.array(TRANSACTION_TYPE_VALUES, dtype=object)
+
+
+@dataclass(frozen=True)
+class EngineReport:
+    """Derived reporting figures for one engine, computed once per simulation run."""
+
+    name: str
+    total_transactions: int
+    tx_success_count: int
+    tx_failure_count: int
+    success_rate: float
+    volume_sats: int
+    volume_btc: float
+    failed_btc: float
+    fees_btc: float
+    btc_days: float
+    operational_stats: Dict[str, float]
+
+    @classmethod
+    def from_result(cls, result: SimulationResult) -> "EngineReport":
+        """Build a report from a SimulationResult, doing each conversion once."""
+        return cls(
+            name=result.engine_name,
+            total_transactions=result.total_transactions,
+            tx_success_count=result.tx_success_count,
+            tx_failure_count=result.tx_failure_count,
+            success_rate=result.success_rate,
+            volume_sats=result.total_volume_processed,
+            volume_btc=result.total_volume_processed / SATS_PER_BTC,
+            failed_btc=result.total_volume_failed / SATS_PER_BTC,
+            fees_btc=result.operational_stats.get("total_fees_btc", 0.0),
+            btc_days=result.btc_days,
+            operational_stats=result.operational_stats,
+        )
+
 
-def print_user_summary(users: list) -> None:
+def print_user_summary(population: UserPopulation) -> None:
     """Print a formatted summary table of user type distribution."""
-    counts = Counter(user.user_type for user in users)
+    counts = np.bincount(population.user_type_codes, minlength=len(USER_TYPES))
+    total = len(population)
+    percentages = counts * (100.0 / total if total > 0 else 0.0)
+
+    lines: List[str] = []
+    lines.append("\n" + RULE_40)
+    lines.append("L2 Capital Velocity - User Population")
+    lines.append(RULE_40)
+    lines.append(f"{'User Type':<15} {'Count':>10} {'Percentage':>12}")
+    lines.append(SUBRULE_40)
+
+    for user_type_value, count, percentage in zip(USER_TYPE_VALUES, counts, percentages):
+        lines.append(f"{user_type_value:<15} {count:>10} {percentage:>11.1f}%")
+
+    lines.append(SUBRULE_40)
+    lines.append(f"{'TOTAL':<15} {total:>10}")
+    lines.append(RULE_40 + "\n")
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+@dataclass(frozen=True)
+class TrafficSummary:
+    """Aggregate traffic figures for the summary table, computed in one pass over the columns."""
+
+    total_transactions: int
+    total_volume_sats: int
+    internal_count: int
+    external_inbound: int
+    external_outbound: int
+    avg_amount: float
+    median_amount: float
+    max_amount: int
+
+    @classmethod
+    def from_batch(cls, batch: TransactionBatch) -> "TrafficSummary":
+        """Reduce the batch's NumPy columns; transaction types via one bincount."""
+        amounts = batch.amount_sats
+        internal_count, external_inbound, external_outbound = (
+            int(count)
+            for count in np.bincount(batch.tx_type_codes, minlength=len(TRANSACTION_TYPES))
+        )
+        return cls(
+            total_transactions=len(batch),
+            total_volume_sats=int(amounts.sum()),
+            internal_count=internal_count,
+            external_inbound=external_inbound,
+            external_outbound=external_outbound,
+            avg_amount=float(amounts.mean()) if len(amounts) else 0.0,
+            median_amount=float(np.median(amounts)) if len(amounts) else 0.0,
+            max_amount=int(amounts.max()) if len(amounts) else 0,
+        )
 
-    print("\n" + "=" * 40)
-    print("L2 Capital Velocity - User Population")
-    print("=" * 40)
-    print(f"{'User Type':<15} {'Count':>10} {'Percentage':>12}")
-    print("-" * 40)
 
-    total = len(users)
-    for user_type in UserType:
-        count = counts.get(user_type, 0)
-        percentage = (count / total) * 100 if total > 0 else 0
-        print(f"{user_type.value:<15} {count:>10} {percentage:>11.1f}%")
+def print_traffic_summary(summary: TrafficSummary) -> None:
+    """Print a formatted summary of traffic statistics."""
+    total_volume_btc = summary.total_volume_sats / SATS_PER_BTC
+    external_total = summary.external_inbound + summary.external_outbound
+
+    lines: List[str] = []
+    lines.append(RULE_50)
+    lines.append("L2 Capital Velocity - Traffic Summary")
+    lines.append(RULE_50)
+    lines.append(f"{'Total Transactions:':<30} {summary.total_transactions:>15,}")
+    lines.append(f"{'Total Volume (sats):':<30} {summary.total_volume_sats:>15,}")
+    lines.append(f"{'Total Volume (BTC):':<30} {total_volume_btc:>15.4f}")
+    lines.append(SUBRULE_50)
+    lines.append(f"{'Internal Transactions:':<30} {summary.internal_count:>15,}")
+    lines.append(f"{'External Inbound:':<30} {summary.external_inbound:>15,}")
+    lines.append(f"{'External Outbound:':<30} {summary.external_outbound:>15,}")
+    lines.append(f"{'External Total:':<30} {external_total:>15,}")
+    lines.append(SUBRULE_50)
+    lines.append(f"{'Avg Amount (sats):':<30} {summary.avg_amount:>15,.0f}")
+    lines.append(f"{'Median Amount (sats):':<30} {summary.median_amount:>15,.0f}")
+    lines.append(f"{'Max Amount (sats):':<30} {summary.max_amount:>15,}")
+    lines.append(RULE_50 + "\n")
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _traffic_columns(batch: TransactionBatch) -> Dict[str, np.ndarray]:
+    """Batch columns keyed by their on-disk names, with tx_type codes decoded."""
+    return {
+        "tx_id": batch.tx_ids,
+        "timestamp": batch.timestamps,
+        "sender_id": batch.sender_ids,
+        "receiver_id": batch.receiver_ids,
+        "amount_sats": batch.amount_sats,
+        "tx_type": _TX_TYPE_VALUES[batch.tx_type_codes],
+    }
+
+
+def save_traffic_csv(batch: TransactionBatch, path: Path) -> None:
+    """
+    Save traffic columns to CSV, creating directory if needed.
+
+    Writes straight from the batch's NumPy columns with PyArrow's C++ CSV
+    writer when pyarrow is installed, falling back to pandas otherwise.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    columns = _traffic_columns(batch)
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        import pandas as pd
+
+        pd.DataFrame(columns).to_csv(path, index=False)
+    else:
+        pa_csv.write_csv(
+            pa.table(columns),
+            path,
+            write_options=pa_csv.WriteOptions(batch_size=65_536, quoting_style="none"),
+        )
+    print(f"Traffic data saved to: {path}")
 
-    print("-" * 40)
-    print(f"{'TOTAL':<15} {total:>10}")
-    print("=" * 40 + "\n")
 
+def save_traffic_parquet(batch: TransactionBatch, path: Path) -> bool:
+    """
+    Save traffic columns as zstd-compressed Parquet, if pyarrow is installed.
 
-def transactions_to_dataframe(transactions: List[Transaction]) -> pd.DataFrame:
-    """Convert list of Transaction objects to a Pandas DataFrame."""
-    return pd.DataFrame([tx.model_dump() for tx in transactions])
+    Parquet loads without text parsing (load_traffic dispatches on the
+    suffix), so it is the faster input for re-running engines on saved traffic.
 
+    Returns:
+        True if the file was written, False if pyarrow is unavailable.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pa_parquet
+    except ImportError:
+        return False
 
-def print_traffic_summary(df: pd.DataFrame) -> None:
-    """Print a formatted summary of traffic statistics."""
-    total_volume_sats = df["amount_sats"].sum()
-    total_volume_btc = total_volume_sats / SATS_PER_BTC
-
-    type_counts = df["tx_type"].value_counts()
-
-    internal_count = type_counts.get(TransactionType.INTERNAL.value, 0)
-    external_inbound = type_counts.get(TransactionType.EXTERNAL_INBOUND.value, 0)
-    external_outbound = type_counts.get(TransactionType.EXTERNAL_OUTBOUND.value, 0)
-    external_total = external_inbound + external_outbound
-
-    print("=" * 50)
-    print("L2 Capital Velocity - Traffic Summary")
-    print("=" * 50)
-    print(f"{'Total Transactions:':<30} {len(df):>15,}")
-    print(f"{'Total Volume (sats):':<30} {total_volume_sats:>15,}")
-    print(f"{'Total Volume (BTC):':<30} {total_volume_btc:>15.4f}")
-    print("-" * 50)
-    print(f"{'Internal Transactions:':<30} {internal_count:>15,}")
-    print(f"{'External Inbound:':<30} {external_inbound:>15,}")
-    print(f"{'External Outbound:':<30} {external_outbound:>15,}")
-    print(f"{'External Total:':<30} {external_total:>15,}")
-    print("-" * 50)
-    print(f"{'Avg Amount (sats):':<30} {df['amount_sats'].mean():>15,.0f}")
-    print(f"{'Median Amount (sats):':<30} {df['amount_sats'].median():>15,.0f}")
-    print(f"{'Max Amount (sats):':<30} {df['amount_sats'].max():>15,}")
-    print("=" * 50 + "\n")
-
-
-def save_traffic_csv(df: pd.DataFrame, path: Path) -> None:
-    """Save traffic DataFrame to CSV, creating directory if needed."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False)
+    pa_parquet.write_table(pa.table(_traffic_columns(batch)), path, compression="zstd")
     print(f"Traffic data saved to: {path}")
+    return True
 
 
-def print_simulation_results(result: SimulationResult) -> None:
-    """Print a formatted summary of simulation results."""
-    total_volume_btc = result.total_volume_processed / SATS_PER_BTC
-    failed_volume_btc = result.total_volume_failed / SATS_PER_BTC
-
-    print("\n" + "=" * 50)
-    print(f"Simulation Results - {result.engine_name} Engine")
-    print("=" * 50)
-    print(f"{'Total Transactions:':<30} {result.total_transactions:>15,}")
-    print(f"{'Successful:':<30} {result.tx_success_count:>15,}")
-    print(f"{'Failed:':<30} {result.tx_failure_count:>15,}")
-    print("-" * 50)
-    print(f"{'Success Rate:':<30} {result.success_rate * 100:>14.1f}%")
-    print("-" * 50)
-    print(f"{'Volume Processed (BTC):':<30} {total_volume_btc:>15.4f}")
-    print(f"{'Volume Failed (BTC):':<30} {failed_volume_btc:>15.4f}")
-    print("=" * 50 + "\n")
+def print_engine_block(report: EngineReport) -> None:
+    """
+    Print one engine's simulation results and, when it reports them, its
+    operational costs (refill engines) or settlement stats (Ark) in one write.
+    """
+    lines = _simulation_results_lines(report)
+    stats = report.operational_stats
+    if "refill_count" in stats:
+        lines.extend(_operational_costs_lines(report))
+    elif "round_count" in stats:
+        lines.extend(_ark_operational_stats_lines(report))
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _simulation_results_lines(report: EngineReport) -> List[str]:
+    """Formatted summary of simulation results."""
+    return [
+        "\n" + RULE_50,
+        f"Simulation Results - {report.name} Engine",
+        RULE_50,
+        f"{'Total Transactions:':<30} {report.total_transactions:>15,}",
+        f"{'Successful:':<30} {report.tx_success_count:>15,}",
+        f"{'Failed:':<30} {report.tx_failure_count:>15,}",
+        SUBRULE_50,
+        f"{'Success Rate:':<30} {report.success_rate * 100:>14.1f}%",
+        SUBRULE_50,
+        f"{'Volume Processed (BTC):':<30} {report.volume_btc:>15.4f}",
+        f"{'Volume Failed (BTC):':<30} {report.failed_btc:>15.4f}",
+        RULE_50 + "\n",
+    ]
+
+
+def _operational_costs_lines(report: EngineReport) -> List[str]:
+    """Operational costs summary for engines with refill capability."""
+    stats = report.operational_stats
+    return [
+        RULE_50,
+        f"Operational Costs - {report.name} Engine",
+        RULE_50,
+        f"{'Refill Operations:':<30} {int(stats.get('refill_count', 0)):>15,}",
+        f"{'Total Fees Paid (BTC):':<30} {report.fees_btc:>15.8f}",
+        f"{'Avg Latency (seconds):':<30} {stats.get('avg_latency_seconds', 0):>15.2f}",
+        RULE_50 + "\n",
+    ]
+
+
+def _ark_operational_stats_lines(report: EngineReport) -> List[str]:
+    """Operational statistics for the Ark engine."""
+    stats = report.operational_stats
+    return [
+        RULE_50,
+        f"Operational Stats - {report.name} Engine",
+        RULE_50,
+        f"{'Settlement Rounds:':<30} {int(stats.get('round_count', 0)):>15,}",
+        f"{'Total Round Fees (BTC):':<30} {report.fees_btc:>15.8f}",
+        f"{'Avg TVL (sats):':<30} {stats.get('avg_tvl', 0):>15,.0f}",
+        RULE_50 + "\n",
+    ]
 
 
 def main() -> None:
     """Initialize simulation, generate traffic, export to CSV, and run simulation."""
     config = SimulationConfig()
 
-    # Generate user population
-    users = generate_users(config)
-    print_user_summary(users)
+    # Generate user population, scanned once into the ID/type columns that the
+    # summary, the traffic generator and the engines all reuse
+    population = UserPopulation.from_users(generate_users(config))
+    print_user_summary(population)
 
-    # Generate traffic
+    # Generate traffic, or reuse the cached batch from an earlier run with the
+    # same config. The columnar batch is shared by the summary, CSV export
+    # and every engine run
     print("Generating transaction traffic...")
-    generator = TrafficGenerator(config)
-    transactions = generator.generate_month_of_traffic(users)
-
-    # Convert to DataFrame and display summary
-    df = transactions_to_dataframe(transactions)
-    print_traffic_summary(df)
-
-    # Save to CSV
-    save_traffic_csv(df, TRAFFIC_CSV_PATH)
-
-    # Collect all results for analysis
-    results: Dict[str, SimulationResult] = {}
-    user_ids = [user.user_id for user in users]
-
-    # Run simulation with PassthroughEngine (baseline - 100% success)
-    print("\nRunning simulation with PassthroughEngine...")
-    passthrough_engine = PassthroughEngine()
-    passthrough_runner = SimulationRunner(TRAFFIC_CSV_PATH, passthrough_engine)
-    passthrough_result = passthrough_runner.run()
-    results["Passthrough"] = passthrough_result
-    print_simulation_results(passthrough_result)
-
-    # Run simulation with LegacyEngine (static Lightning channels)
-    print("\nRunning simulation with LegacyEngine...")
-    legacy_engine = LegacyEngine(user_ids)
-    legacy_runner = SimulationRunner(TRAFFIC_CSV_PATH, legacy_engine)
-    legacy_result = legacy_runner.run()
-    results["Legacy"] = legacy_result
-    print_simulation_results(legacy_result)
-
-    # Run simulation with LegacyRefillEngine (JIT/Splicing liquidity management)
-    print("\nRunning simulation with LegacyRefillEngine...")
-    refill_engine = LegacyRefillEngine(user_ids)
-    refill_runner = SimulationRunner(TRAFFIC_CSV_PATH, refill_engine)
-    refill_result = refill_runner.run()
-    results["LegacyRefill"] = refill_result
-    print_simulation_results(refill_result)
-    print_operational_costs(refill_result)
-
-    # Run simulation with ArkEngine (Pooled liquidity with round-based settlement)
-    print("\nRunning simulation with ArkEngine...")
-    ark_engine = ArkEngine(user_ids)
-    ark_runner = SimulationRunner(TRAFFIC_CSV_PATH, ark_engine)
-    ark_result = ark_runner.run()
-    results["Ark"] = ark_result
-    print_simulation_results(ark_result)
-    print_ark_operational_stats(ark_result)
+    traffic = load_or_generate_traffic(config, population)
+    print_traffic_summary(TrafficSummary.from_batch(traffic))
+
+    # Save to CSV, plus a Parquet copy for fast reloads when pyarrow is available
+    save_traffic_csv(traffic, TRAFFIC_CSV_PATH)
+    save_traffic_parquet(traffic, TRAFFIC_PARQUET_PATH)
+
+    # Run all engines over the shared traffic (in parallel where cores allow)
+    # One shared int64 ID array covers every engine and pickles compactly for
+    # the worker processes
+    user_ids = population.user_ids
+    engine_factories: Dict[str, EngineFactory] = {
+        # Baseline - 100% success
+        "Passthrough": PassthroughEngine,
+        # Static Lightning channels
+        "Legacy": partial(LegacyEngine, user_ids),
+        # JIT/Splicing liquidity management
+        "LegacyRefill": partial(LegacyRefillEngine, user_ids),
+        # Pooled liquidity with round-based settlement
+        "Ark": partial(ArkEngine, user_ids),
+    }
+    print(f"\nRunning simulations for {', '.join(engine_factories)} engines...")
+    results: Dict[str, SimulationResult] = run_engines(engine_factories, traffic)
+
+    # Render the charts on a background thread while the reports below are
+    # formatted; Agg releases the GIL while rasterizing and encoding the PNGs
+    # (matplotlib is only imported here)
+    from src.analysis.plotting import render_comparison
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    plot_executor = ThreadPoolExecutor(max_workers=1)
+    saved_plots = plot_executor.submit(render_comparison, results, str(OUTPUT_DIR))
+    plot_executor.shutdown(wait=False)
+
+    # Print per-engine results once every run has finished
+    reports: Dict[str, EngineReport] = {
+        name: EngineReport.from_result(result) for name, result in results.items()
+    }
+    print()
+    for report in reports.values():
+        print_engine_block(report)
 
     # Print comparison summary
-    print_comparison_summary(passthrough_result, legacy_result, refill_result, ark_result)
-    print_ark_vs_legacy_comparison(legacy_result, ark_result)
+    print_comparison_summary(
+        reports["Passthrough"], reports["Legacy"], reports["LegacyRefill"], reports["Ark"]
+    )
+    print_ark_vs_legacy_comparison(reports["Legacy"], reports["Ark"])
 
     # Print Delving Bitcoin style capital efficiency summary
-    print_capital_efficiency_summary(results)
+    print_capital_efficiency_summary(reports)
 
-    # Generate visualization plots
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    plot_comparison(results, str(OUTPUT_DIR))
+    # Wait for the visualization plots; paths are printed here to keep output ordered
+    for path in saved_plots.result():
+        print(f"Saved: {path}")
     print(f"\nVisualization plots saved to: {OUTPUT_DIR}/")
 
 
-def print_operational_costs(result: SimulationResult) -> None:
-    """Print operational costs summary for engines with refill capability."""
-    stats = result.operational_stats
-    if not stats:
-        return
-
-    print("=" * 50)
-    print(f"Operational Costs - {result.engine_name} Engine")
-    print("=" * 50)
-    print(f"{'Refill Operations:':<30} {int(stats.get('refill_count', 0)):>15,}")
-    print(f"{'Total Fees Paid (BTC):':<30} {stats.get('total_fees_btc', 0):>15.8f}")
-    print(f"{'Avg Latency (seconds):':<30} {stats.get('avg_latency_seconds', 0):>15.2f}")
-    print("=" * 50 + "\n")
-
-
-def print_ark_operational_stats(result: SimulationResult) -> None:
-    """Print operational statistics for Ark engine."""
-    stats = result.operational_stats
-    if not stats:
-        return
-
-    print("=" * 50)
-    print(f"Operational Stats - {result.engine_name} Engine")
-    print("=" * 50)
-    print(f"{'Settlement Rounds:':<30} {int(stats.get('round_count', 0)):>15,}")
-    print(f"{'Total Round Fees (BTC):':<30} {stats.get('total_fees_btc', 0):>15.8f}")
-    print(f"{'Avg TVL (sats):':<30} {stats.get('avg_tvl', 0):>15,.0f}")
-    print("=" * 50 + "\n")
-
-
 def print_comparison_summary(
-    baseline: SimulationResult,
-    legacy: SimulationResult,
-    refill: SimulationResult | None = None,
-    ark: SimulationResult | None = None,
+    baseline: EngineReport,
+    legacy: EngineReport,
+    refill: EngineReport | None = None,
+    ark: EngineReport | None = None,
 ) -> None:
-    """Print a comparison of all engine results."""
-    baseline_btc = baseline.total_volume_processed / SATS_PER_BTC
-    legacy_btc = legacy.total_volume_processed / SATS_PER_BTC
-    legacy_failed_btc = legacy.total_volume_failed / SATS_PER_BTC
-
-    if refill is None and ark is None:
-        # Two-column comparison
-        print("=" * 50)
-        print("Engine Comparison Summary")
-        print("=" * 50)
-        print(f"{'Metric':<30} {'Passthrough':>10} {'Legacy':>10}")
-        print("-" * 50)
-        print(f"{'Success Rate:':<30} {baseline.success_rate * 100:>9.1f}% {legacy.success_rate * 100:>9.1f}%")
-        print(f"{'Volume Processed (BTC):':<30} {baseline_btc:>10.4f} {legacy_btc:>10.4f}")
-        print(f"{'Failed Transactions:':<30} {baseline.tx_failure_count:>10,} {legacy.tx_failure_count:>10,}")
-        print(f"{'Failed Volume (BTC):':<30} {0.0:>10.4f} {legacy_failed_btc:>10.4f}")
-        print("=" * 50 + "\n")
-    elif ark is None:
-        # Three-column comparison (no Ark)
-        refill_btc = refill.total_volume_processed / SATS_PER_BTC
-        refill_failed_btc = refill.total_volume_failed / SATS_PER_BTC
-        refill_fees = refill.operational_stats.get("total_fees_btc", 0)
-
-        print("=" * 70)
-        print("Engine Comparison Summary")
-        print("=" * 70)
-        print(f"{'Metric':<30} {'Passthrough':>12} {'Legacy':>12} {'Refill':>12}")
-        print("-" * 70)
-        print(
-            f"{'Success Rate:':<30} "
-            f"{baseline.success_rate * 100:>11.1f}% "
-            f"{legacy.success_rate * 100:>11.1f}% "
-            f"{refill.success_rate * 100:>11.1f}%"
-        )
-        print(
-            f"{'Volume Processed (BTC):':<30} "
-            f"{baseline_btc:>12.4f} "
-            f"{legacy_btc:>12.4f} "
-            f"{refill_btc:>12.4f}"
-        )
-        print(
-            f"{'Failed Transactions:':<30} "
-            f"{baseline.tx_failure_count:>12,} "
-            f"{legacy.tx_failure_count:>12,} "
-            f"{refill.tx_failure_count:>12,}"
-        )
-        print(
-            f"{'Failed Volume (BTC):':<30} "
-            f"{0.0:>12.4f} "
-            f"{legacy_failed_btc:>12.4f} "
-            f"{refill_failed_btc:>12.4f}"
-        )
-        print(
-            f"{'Operational Fees (BTC):':<30} "
-            f"{0.0:>12.4f} "
-            f"{0.0:>12.4f} "
-            f"{refill_fees:>12.8f}"
-        )
-        print("=" * 70 + "\n")
-    else:
-        # Four-column comparison (all engines)
-        refill_btc = refill.total_volume_processed / SATS_PER_BTC
-        refill_failed_btc = refill.total_volume_failed / SATS_PER_BTC
-        refill_fees = refill.operational_stats.get("total_fees_btc", 0)
-
-        ark_btc = ark.total_volume_processed / SATS_PER_BTC
-        ark_failed_btc = ark.total_volume_failed / SATS_PER_BTC
-        ark_fees = ark.operational_stats.get("total_fees_btc", 0)
-
-        print("=" * 90)
-        print("Engine Comparison Summary")
-        print("=" * 90)
-        print(f"{'Metric':<26} {'Passthrough':>12} {'Legacy':>12} {'Refill':>12} {'Ark':>12}")
-        print("-" * 90)
-        print(
-            f"{'Success Rate:':<26} "
-            f"{baseline.success_rate * 100:>11.1f}% "
-            f"{legacy.success_rate * 100:>11.1f}% "
-            f"{refill.success_rate * 100:>11.1f}% "
-            f"{ark.success_rate * 100:>11.1f}%"
-        )
-        print(
-            f"{'Volume Processed (BTC):':<26} "
-            f"{baseline_btc:>12.4f} "
-            f"{legacy_btc:>12.4f} "
-            f"{refill_btc:>12.4f} "
-            f"{ark_btc:>12.4f}"
-        )
-        print(
-            f"{'Failed Transactions:':<26} "
-            f"{baseline.tx_failure_count:>12,} "
-            f"{legacy.tx_failure_count:>12,} "
-            f"{refill.tx_failure_count:>12,} "
-            f"{ark.tx_failure_count:>12,}"
-        )
-        print(
-            f"{'Failed Volume (BTC):':<26} "
-            f"{0.0:>12.4f} "
-            f"{legacy_failed_btc:>12.4f} "
-            f"{refill_failed_btc:>12.4f} "
-            f"{ark_failed_btc:>12.4f}"
-        )
-        print(
-            f"{'Operational Fees (BTC):':<26} "
-            f"{0.0:>12.8f} "
-            f"{0.0:>12.8f} "
-            f"{refill_fees:>12.8f} "
-            f"{ark_fees:>12.8f}"
-        )
-        print("=" * 90 + "\n")
+    """Print a comparison of all engine results, one column per engine supplied."""
+    columns = [("Passthrough", baseline), ("Legacy", legacy), ("Refill", refill), ("Ark", ark)]
+    _render_comparison([(label, report) for label, report in columns if report is not None])
 
 
-def print_ark_vs_legacy_comparison(legacy: SimulationResult, ark: SimulationResult) -> None:
+def _render_comparison(columns: List[Tuple[str, EngineReport]]) -> None:
+    """
+    Render the engine comparison table for any number of engine columns.
+
+    Column and rule widths are derived from the column count, and each row
+    shape is formatted through a template built once per table.
+    """
+    count = len(columns)
+    label_width = 26 if count > 3 else 30
+    col_width = 10 if count < 3 else 12
+    rule_width = 50 + 20 * max(count - 2, 0)
+
+    row_fmt = f"{{:<{label_width}}}" + f" {{:>{col_width}{{spec}}}}" * count
+    pct_row_fmt = f"{{:<{label_width}}}" + f" {{:>{col_width - 1}.1f}}%" * count
+    rule = "=" * rule_width
+    reports = [report for _, report in columns]
+
+    lines: List[str] = [
+        rule,
+        "Engine Comparison Summary",
+        rule,
+        row_fmt.format("Metric", *(label for label, _ in columns), spec=""),
+        "-" * rule_width,
+        pct_row_fmt.format("Success Rate:", *(r.success_rate * 100 for r in reports)),
+        row_fmt.format("Volume Processed (BTC):", *(r.volume_btc for r in reports), spec=".4f"),
+        row_fmt.format("Failed Transactions:", *(r.tx_failure_count for r in reports), spec=","),
+        row_fmt.format("Failed Volume (BTC):", *(r.failed_btc for r in reports), spec=".4f"),
+        row_fmt.format("Operational Fees (BTC):", *(r.fees_btc for r in reports), spec=".8f"),
+        rule + "\n",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def print_ark_vs_legacy_comparison(legacy: EngineReport, ark: EngineReport) -> None:
     """Print detailed comparison of Ark vs Legacy highlighting capital efficiency."""
     legacy_tvl = 100 * 5_000_000 * 0.5  # 100 users * 5M capacity * 50% split
     ark_tvl = ARK_POOL_CAPACITY
 
-    print("=" * 70)
-    print("Ark vs Legacy - Capital Efficiency Analysis")
-    print("=" * 70)
-    print(f"{'Metric':<40} {'Legacy':>12} {'Ark':>12}")
-    print("-" * 70)
-    print(
+    lines: List[str] = []
+    lines.append(RULE_70)
+    lines.append("Ark vs Legacy - Capital Efficiency Analysis")
+    lines.append(RULE_70)
+    lines.append(f"{'Metric':<40} {'Legacy':>12} {'Ark':>12}")
+    lines.append(SUBRULE_70)
+    lines.append(
         f"{'TVL (sats):':<40} "
         f"{legacy_tvl:>12,} "
         f"{ark_tvl:>12,}"
     )
-    print(
+    lines.append(
         f"{'TVL (BTC):':<40} "
         f"{legacy_tvl / SATS_PER_BTC:>12.2f} "
         f"{ark_tvl / SATS_PER_BTC:>12.2f}"
     )
-    print(
+    lines.append(
         f"{'Capital Reduction:':<40} "
         f"{'--':>12} "
         f"{(1 - ark_tvl / legacy_tvl) * 100:>11.0f}%"
     )
-    print("-" * 70)
-    print(
+    lines.append(SUBRULE_70)
+    lines.append(
         f"{'Success Rate:':<40} "
         f"{legacy.success_rate * 100:>11.1f}% "
         f"{ark.success_rate * 100:>11.1f}%"
     )
     success_diff = ark.success_rate - legacy.success_rate
     success_symbol = "+" if success_diff >= 0 else ""
-    print(
+    lines.append(
         f"{'Success Rate Difference:':<40} "
         f"{'--':>12} "
         f"{success_symbol}{success_diff * 100:>10.1f}%"
     )
-    print("-" * 70)
-    print(
+    lines.append(SUBRULE_70)
+    lines.append(
         f"{'Failed Transactions:':<40} "
         f"{legacy.tx_failure_count:>12,} "
         f"{ark.tx_failure_count:>12,}"
     )
 
     # Capital efficiency metric: volume processed per BTC of TVL
-    legacy_vol = legacy.total_volume_processed
-    ark_vol = ark.total_volume_processed
+    legacy_vol = legacy.volume_sats
+    ark_vol = ark.volume_sats
     legacy_efficiency = legacy_vol / legacy_tvl if legacy_tvl > 0 else 0
     ark_efficiency = ark_vol / ark_tvl if ark_tvl > 0 else 0
 
-    print("-" * 70)
-    print(
+    lines.append(SUBRULE_70)
+    lines.append(
         f"{'Volume/TVL Ratio:':<40} "
         f"{legacy_efficiency:>12.2f}x "
         f"{ark_efficiency:>12.2f}x"
     )
-    print("=" * 70 + "\n")
+    lines.append(RULE_70 + "\n")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
-def print_capital_efficiency_summary(results: Dict[str, SimulationResult]) -> None:
+def print_capital_efficiency_summary(reports: Dict[str, EngineReport]) -> None:
     """
     Print Delving Bitcoin style summary table with capital efficiency metrics.
 
     Includes Success Rate, BTC-Days (capital cost), and Operational Fees.
     """
-    print("\n" + "=" * 80)
-    print("CAPITAL EFFICIENCY SUMMARY")
-    print("Delving Bitcoin Style Analysis")
-    print("=" * 80)
-    print(
+    lines: List[str] = []
+    lines.append("\n" + RULE_80)
+    lines.append("CAPITAL EFFICIENCY SUMMARY")
+    lines.append("Delving Bitcoin Style Analysis")
+    lines.append(RULE_80)
+    lines.append(
         f"{'Engine':<16} "
         f"{'Success Rate':>14} "
         f"{'BTC-Days':>16} "
         f"{'Op Fees (BTC)':>18} "
         f"{'Score':>10}"
     )
-    print("-" * 80)
+    lines.append(SUBRULE_80)
 
     # Calculate metrics for each engine
     metrics = []
-    for engine_name, result in results.items():
-        btc_days = calculate_btc_days(result.tvl_history)
-        op_fees = result.operational_stats.get("total_fees_btc", 0.0)
-        success_rate = result.success_rate
-
+    for engine_name, report in reports.items():
         # Composite score: penalize low success, high capital, and high fees
         # Higher score = better (normalized against worst case)
-        score = success_rate * 100  # Base score from success rate
+        score = report.success_rate * 100  # Base score from success rate
         metrics.append({
             "name": engine_name,
-            "success_rate": success_rate,
-            "btc_days": btc_days,
-            "op_fees": op_fees,
+            "success_rate": report.success_rate,
+            "btc_days": report.btc_days,
+            "op_fees": report.fees_btc,
             "score": score,
         })
 
@@ -426,32 +499,34 @@ def print_capital_efficiency_summary(results: Dict[str, SimulationResult]) -> No
         btc_days_str = f"{m['btc_days']:.2f}" if m["btc_days"] > 0 else "N/A"
         op_fees_str = f"{m['op_fees']:.8f}" if m["op_fees"] > 0 else "0.00000000"
 
-        print(
-            f"{m['name']:<16} "
-            f"{m['success_rate'] * 100:>13.1f}% "
-            f"{btc_days_str:>16} "
-            f"{op_fees_str:>18} "
-            f"{m['score']:>10.1f}"
+        lines.append(
+            _EFFICIENCY_ROW_FMT.format(
+                name=m["name"],
+                success_pct=m["success_rate"] * 100,
+                btc_days=btc_days_str,
+                op_fees=op_fees_str,
+                score=m["score"],
+            )
         )
 
-    print("-" * 80)
+    lines.append(SUBRULE_80)
 
     # Find the most capital-efficient engine with acceptable success rate
     viable_engines = [m for m in metrics if m["success_rate"] >= 0.95]
     if viable_engines:
         best = min(viable_engines, key=lambda x: x["btc_days"])
-        print(f"\n{'Best Capital Efficiency (≥95% success):':<40} {best['name']}")
-        print(f"{'  → BTC-Days required:':<40} {best['btc_days']:.2f}")
+        lines.append(f"\n{'Best Capital Efficiency (≥95% success):':<40} {best['name']}")
+        lines.append(f"{'  → BTC-Days required:':<40} {best['btc_days']:.2f}")
 
         # Compare to Legacy baseline
         legacy_metrics = next((m for m in metrics if m["name"] == "Legacy"), None)
         if legacy_metrics and best["name"] != "Legacy":
             savings_pct = (1 - best["btc_days"] / legacy_metrics["btc_days"]) * 100
-            print(f"{'  → Capital savings vs Legacy:':<40} {savings_pct:.1f}%")
+            lines.append(f"{'  → Capital savings vs Legacy:':<40} {savings_pct:.1f}%")
 
-    print("=" * 80 + "\n")
+    lines.append(RULE_80 + "\n")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 if __name__ == "__main__":
     main()
-
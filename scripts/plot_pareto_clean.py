@@ -7,15 +7,36 @@ liquidity cost. High-signal, low-noise visualization for scientific publications
 import sys
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Sequence
 
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib import style
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 
 # Ensure project root is available for imports when run directly
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from src.analysis.plotting import PNG_PIL_KWARGS
+
 OUTPUT_DIR: Path = PROJECT_ROOT / "output"
 
+# Applied over the seaborn style: its font list starts with fonts that are
+# usually absent (Arial), so pin the bundled DejaVu Sans for text and the
+# \leftarrow / \downarrow mathtext glyphs, and never shell out to TeX
+RC_OVERRIDES: dict[str, object] = {
+    "font.family": "DejaVu Sans",
+    "mathtext.fontset": "dejavusans",
+    "text.usetex": False,
+}
+
+# Style sheets applied around every figure built or drawn by this script
+PLOT_STYLE: list[str | dict[str, object]] = ["seaborn-v0_8-whitegrid", RC_OVERRIDES]
+
 
 @dataclass(frozen=True)
 class DataPoint:
@@ -69,7 +90,7 @@ POINTS: tuple[DataPoint, ...] = (
 )
 
 
-def draw_crosshairs(ax: plt.Axes, anchor_point: DataPoint) -> None:
+def draw_crosshairs(ax: Axes, anchor_point: DataPoint) -> None:
     """
     Draw crosshairs from the anchor point (Legacy Optimized).
     Creates a visual boundary - points in bottom-left rectangle are strictly better.
@@ -105,12 +126,12 @@ def draw_crosshairs(ax: plt.Axes, anchor_point: DataPoint) -> None:
     )
 
 
-def draw_ark_trajectory(ax: plt.Axes) -> None:
+def draw_ark_trajectory(ax: Axes, points: Sequence[DataPoint]) -> None:
     """
     Draw a faint line connecting the three Ark points.
     Shows they are the result of tuning one variable (round duration).
     """
-    ark_points = [p for p in POINTS if p.label.startswith('Ark')]
+    ark_points = [p for p in points if p.label.startswith('Ark')]
     # Sort by x-value (operational fees) to connect in order
     ark_points_sorted = sorted(ark_points, key=lambda p: p.x)
     
@@ -129,7 +150,7 @@ def draw_ark_trajectory(ax: plt.Axes) -> None:
         )
 
 
-def add_simulation_context_box(ax: plt.Axes) -> None:
+def add_simulation_context_box(ax: Axes) -> None:
     """
     Add a text box with simulation parameters in the center-right area.
     """
@@ -167,89 +188,151 @@ def add_simulation_context_box(ax: plt.Axes) -> None:
     )
 
 
-def plot_points(ax: plt.Axes) -> None:
-    """Plot all data points with their specified styles."""
-    for point in POINTS:
-        scatter_kwargs = {
-            'x': point.x,
-            'y': point.y,
-            'c': point.color,
-            'marker': point.marker,
-            's': 100,
-            'alpha': point.alpha,
-            'label': point.label,
-            'zorder': 10,
-        }
-        
-        # Only set edgecolors for filled markers
-        if point.marker != 'x':
-            scatter_kwargs['edgecolors'] = 'white'
-            scatter_kwargs['linewidths'] = 1.0
-        else:
-            scatter_kwargs['linewidths'] = 1.5
-        
-        ax.scatter(**scatter_kwargs)
+def marker_edge(marker: str) -> tuple[str | None, float]:
+    """Edge colour and width: white outline on filled markers, heavier 'x' strokes."""
+    if marker == 'x':
+        return None, 1.5
+    return 'white', 1.0
+
+
+def plot_points(ax: Axes, points: Sequence[DataPoint]) -> list[Line2D]:
+    """
+    Plot all data points with their specified styles.
+
+    Points sharing a marker are drawn with a single array-based scatter call
+    (per-point colour and alpha folded into RGBA), so the figure holds one
+    collection per marker rather than one per point. Scatter collections
+    cannot carry per-point labels, so legend proxies are returned instead.
+
+    Returns:
+        Legend handles, one per point, in input order.
+    """
+    # Per-point RGBA and per-marker edge style, each resolved once and shared
+    # by the scatter collections and the legend proxies
+    colors = [to_rgba(p.color, p.alpha) for p in points]
+    edges = {p.marker: marker_edge(p.marker) for p in points}
+
+    indices_by_marker: dict[str, list[int]] = {}
+    for i, point in enumerate(points):
+        indices_by_marker.setdefault(point.marker, []).append(i)
+
+    for marker, indices in indices_by_marker.items():
+        edgecolor, linewidth = edges[marker]
+        ax.scatter(
+            np.fromiter((points[i].x for i in indices), dtype=float, count=len(indices)),
+            np.fromiter((points[i].y for i in indices), dtype=float, count=len(indices)),
+            c=[colors[i] for i in indices],
+            marker=marker,
+            s=100,
+            edgecolors=edgecolor,
+            linewidths=linewidth,
+            zorder=10,
+        )
+
+    return [
+        Line2D(
+            [],
+            [],
+            linestyle='none',
+            marker=point.marker,
+            markersize=10,  # sqrt of the scatter area s=100
+            color=color,
+            markeredgecolor=edges[point.marker][0],
+            markeredgewidth=edges[point.marker][1],
+            label=point.label,
+        )
+        for point, color in zip(points, colors)
+    ]
+
+
+def render(
+    fig: Figure,
+    points: Sequence[DataPoint] = POINTS,
+    output_path: Path = OUTPUT_DIR / "pareto_final_clean.png",
+) -> None:
+    """
+    Draw the Pareto chart for points onto fig and save it to output_path.
+
+    The figure is cleared first, so a sweep driver can reuse one Figure
+    and canvas for many renders instead of building one per chart.
+
+    Args:
+        fig: Figure with an attached canvas (e.g. FigureCanvasAgg).
+        points: Data points to plot.
+        output_path: Destination PNG path; its directory is created if needed.
+    """
+    fig.clear()
+    with style.context(PLOT_STYLE):
+        ax = fig.subplots()
+
+        # Set axis limits first (needed for crosshairs calculation)
+        max_x = max(p.x for p in points) * 1.15
+        max_y = max(p.y for p in points) * 1.15  # Increased padding for headroom above Legacy points
+        ax.set_xlim(left=-0.005, right=max_x)  # Negative left limit to show x=0 marker fully
+        ax.set_ylim(bottom=0, top=max_y)
+
+        # Draw trajectory first (lowest zorder)
+        draw_ark_trajectory(ax, points)
+
+        # Draw crosshairs from Legacy (Optimized)
+        legacy_opt = next((p for p in points if 'Legacy (Optimized)' in p.label), None)
+        if legacy_opt is not None:
+            draw_crosshairs(ax, legacy_opt)
+
+        # Plot points on top
+        legend_handles = plot_points(ax, points)
+
+        # Add simulation context box
+        add_simulation_context_box(ax)
+
+        # Enhanced formatting
+        ax.set_title(
+            "Capital Efficiency vs. Operational Cost",
+            fontsize=18,
+            fontweight="bold",
+            pad=20,
+        )
+        ax.set_xlabel(
+            "Operational Fees (BTC) $\\leftarrow$ Lower is Better",
+            fontsize=13,
+            fontweight='medium',
+        )
+        ax.set_ylabel(
+            "Liquidity Cost (BTC-Days) $\\downarrow$ Lower is Better",
+            fontsize=13,
+            fontweight='medium',
+        )
+
+        ax.grid(alpha=0.3, linestyle='-', linewidth=0.5)
+
+        # Legend in upper right to clear top-left corner
+        ax.legend(
+            handles=legend_handles,
+            loc="upper right",
+            frameon=True,
+            fontsize=10,
+            framealpha=0.95,
+            edgecolor='lightgrey',
+        )
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        fig.tight_layout(pad=2.0)  # Tighter layout
+        fig.savefig(output_path, dpi=300, bbox_inches="tight", pil_kwargs=PNG_PIL_KWARGS)
 
 
 def main() -> None:
-    """Generate and save the clean, uncluttered Pareto scatter plot."""
-    plt.style.use("seaborn-v0_8-whitegrid")
-    fig, ax = plt.subplots(figsize=(10, 7))
-    
-    # Set axis limits first (needed for crosshairs calculation)
-    max_x = max(p.x for p in POINTS) * 1.15
-    max_y = max(p.y for p in POINTS) * 1.15  # Increased padding for headroom above Legacy points
-    ax.set_xlim(left=-0.005, right=max_x)  # Negative left limit to show x=0 marker fully
-    ax.set_ylim(bottom=0, top=max_y)
-    
-    # Draw trajectory first (lowest zorder)
-    draw_ark_trajectory(ax)
-    
-    # Draw crosshairs from Legacy (Optimized)
-    legacy_opt = next(p for p in POINTS if 'Legacy (Optimized)' in p.label)
-    draw_crosshairs(ax, legacy_opt)
-    
-    # Plot points on top
-    plot_points(ax)
-    
-    # Add simulation context box
-    add_simulation_context_box(ax)
-    
-    # Enhanced formatting
-    ax.set_title(
-        "Capital Efficiency vs. Operational Cost",
-        fontsize=18,
-        fontweight="bold",
-        pad=20,
-    )
-    ax.set_xlabel(
-        "Operational Fees (BTC) $\\leftarrow$ Lower is Better",
-        fontsize=13,
-        fontweight='medium',
-    )
-    ax.set_ylabel(
-        "Liquidity Cost (BTC-Days) $\\downarrow$ Lower is Better",
-        fontsize=13,
-        fontweight='medium',
-    )
-    
-    ax.grid(alpha=0.3, linestyle='-', linewidth=0.5)
-    
-    # Legend in upper right to clear top-left corner
-    ax.legend(
-        loc="upper right",
-        frameon=True,
-        fontsize=10,
-        framealpha=0.95,
-        edgecolor='lightgrey',
-    )
-    
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    """
+    Generate and save the clean, uncluttered Pareto scatter plot.
+
+    Draws on a standalone Figure with an Agg canvas rather than through
+    pyplot, so no backend selection or global figure state is set up.
+    """
     output_path = OUTPUT_DIR / "pareto_final_clean.png"
-    plt.tight_layout(pad=2.0)  # Tighter layout
-    plt.savefig(output_path, dpi=300, bbox_inches="tight")
-    plt.close(fig)
-    
+    with style.context(PLOT_STYLE):
+        fig = Figure(figsize=(10, 7))
+    FigureCanvasAgg(fig)
+    render(fig, POINTS, output_path)
+
     print(f"Clean Pareto chart saved to {output_path}")
 
 
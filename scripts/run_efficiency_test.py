@@ -6,75 +6,65 @@ Demonstrates the trade-off between Round Interval (Operational Cost) and
 Liquidity Reliability by comparing LegacyRefill with Ark at different round intervals.
 """
 import sys
+from functools import partial
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
 # Ensure project root is in path
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-# Apply configuration overrides BEFORE importing dependent modules
-import src.config
-
-src.config.TOTAL_USERS = 1000
-src.config.TARGET_TRANSACTIONS = 100_000
-src.config.ARK_POOL_CAPACITY = 500_000_000  # 500M sats
-
-# Patch the SimulationConfig defaults
-_original_init = src.config.SimulationConfig.__init__
-
-
-def _patched_init(self):
-    object.__setattr__(self, "SEED", 42)
-    object.__setattr__(self, "TOTAL_USERS", 1000)
-    object.__setattr__(
-        self,
-        "USER_DISTRIBUTION",
-        {"MERCHANT": 0.05, "CONSUMER": 0.85, "HODLER": 0.10},
-    )
-    object.__setattr__(self, "SIMULATION_DAYS", 30)
-    object.__setattr__(self, "TARGET_TRANSACTIONS", 100_000)
-    object.__setattr__(self, "INTERNAL_TX_RATIO", 0.20)
-    object.__setattr__(self, "AMOUNT_MU", 9.8)
-    object.__setattr__(self, "AMOUNT_SIGMA", 1.2)
-    object.__setattr__(self, "PEAK_HOUR_START", 8)
-    object.__setattr__(self, "PEAK_HOUR_END", 20)
-    object.__setattr__(self, "PEAK_MULTIPLIER", 2.0)
-    object.__setattr__(
-        self,
-        "SENDER_WEIGHTS",
-        {"MERCHANT": 0.02, "CONSUMER": 0.93, "HODLER": 0.05},
-    )
-    object.__setattr__(
-        self,
-        "RECEIVER_WEIGHTS",
-        {"MERCHANT": 0.60, "CONSUMER": 0.30, "HODLER": 0.10},
-    )
-
-
-src.config.SimulationConfig.__init__ = _patched_init
-
-# Now import the rest of the modules
 import pandas as pd
 
-from src.analysis.metrics import calculate_btc_days
-from src.config import ARK_POOL_CAPACITY, SimulationConfig
+from src.config import SimulationConfig
 from src.engines.ark_engine import ArkEngine
 from src.engines.legacy_refill_engine import LegacyRefillEngine
-from src.models import Transaction
-from src.simulation.runner import SimulationResult, SimulationRunner
+from src.models import TRANSACTION_TYPE_VALUES, TransactionBatch, UserPopulation
+from src.simulation.parallel import EngineFactory, run_engines
+from src.simulation.runner import SimulationResult
 from src.traffic.traffic_generator import TrafficGenerator
 from src.traffic.user_generator import generate_users
 
 SATS_PER_BTC: int = 100_000_000
 DATA_DIR: Path = PROJECT_ROOT / "data"
 TRAFFIC_CSV_PATH: Path = DATA_DIR / "traffic_seed_efficiency_test.csv"
+TRAFFIC_PARQUET_PATH: Path = DATA_DIR / "traffic_seed_efficiency_test.parquet"
 OUTPUT_DIR: Path = PROJECT_ROOT / "output"
 
+# Scenario overrides, passed explicitly rather than patched into src.config
+TOTAL_USERS: int = 1000
+TARGET_TRANSACTIONS: int = 100_000
+ARK_POOL_CAPACITY: int = 500_000_000  # 500M sats
 
-def transactions_to_dataframe(transactions: list[Transaction]) -> pd.DataFrame:
-    """Convert list of Transaction objects to a Pandas DataFrame."""
-    return pd.DataFrame([tx.model_dump() for tx in transactions])
+# Display titles for each simulation pass, keyed like the results
+PASS_TITLES: Dict[str, str] = {
+    "Legacy": "Legacy Refill (Baseline)",
+    "Ark-10m": "Ark (10 Minute Rounds)",
+    "Ark-1h": "Ark (1 Hour Rounds)",
+    "Ark-2h": "Ark (2 Hour Rounds)",
+}
+
+
+def batch_to_dataframe(batch: TransactionBatch) -> pd.DataFrame:
+    """
+    Wrap a TransactionBatch's columns in a Pandas DataFrame.
+
+    The typed NumPy columns are handed to pandas without a copy, instead of
+    building a row per transaction.
+    """
+    return pd.DataFrame(
+        {
+            "tx_id": batch.tx_ids,
+            "timestamp": batch.timestamps,
+            "sender_id": batch.sender_ids,
+            "receiver_id": batch.receiver_ids,
+            "amount_sats": batch.amount_sats,
+            "tx_type": pd.Categorical.from_codes(
+                batch.tx_type_codes, categories=TRANSACTION_TYPE_VALUES
+            ),
+        },
+        copy=False,
+    )
 
 
 def save_traffic_csv(df: pd.DataFrame, path: Path) -> None:
@@ -84,6 +74,33 @@ def save_traffic_csv(df: pd.DataFrame, path: Path) -> None:
     print(f"Traffic data saved to: {path}\n")
 
 
+def save_traffic_parquet(df: pd.DataFrame, path: Path) -> None:
+    """Save a zstd Parquet copy of the traffic for fast reloads, if pyarrow is installed."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, compression="zstd", index=False)
+    print(f"Traffic data saved to: {path}\n")
+
+
+def print_pass_result(pass_number: int, title: str, result: SimulationResult) -> None:
+    """Print the headline figures for one simulation pass."""
+    lines: List[str] = []
+    lines.append("=" * 90)
+    lines.append(f"PASS {pass_number}: {title}")
+    lines.append("=" * 90)
+    lines.append(f"Success Rate: {result.success_rate * 100:.1f}%")
+    lines.append(f"Op Fees: {result.operational_stats.get('total_fees_btc', 0.0):.8f} BTC")
+    if "round_count" in result.operational_stats:
+        lines.append(f"BTC-Days: {result.btc_days:.2f}")
+        lines.append(f"Round Count: {int(result.operational_stats['round_count']):,}\n")
+    else:
+        lines.append(f"BTC-Days: {result.btc_days:.2f}\n")
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
 def print_efficiency_comparison(results: Dict[str, SimulationResult]) -> None:
     """
     Print comparison table showing trade-offs between round intervals.
@@ -94,21 +111,22 @@ def print_efficiency_comparison(results: Dict[str, SimulationResult]) -> None:
     - Op Fees (Did we undercut Legacy?)
     - BTC-Days (Did we keep capital low?)
     """
-    print("\n" + "=" * 90)
-    print("EFFICIENCY CROSSOVER TEST - Round Interval Trade-offs")
-    print("=" * 90)
-    print(
+    lines: List[str] = []
+    lines.append("\n" + "=" * 90)
+    lines.append("EFFICIENCY CROSSOVER TEST - Round Interval Trade-offs")
+    lines.append("=" * 90)
+    lines.append(
         f"{'Config':<20} "
         f"{'Success Rate':>14} "
         f"{'Op Fees (BTC)':>18} "
         f"{'BTC-Days':>16} "
         f"{'Round Count':>14}"
     )
-    print("-" * 90)
+    lines.append("-" * 90)
 
     metrics = []
     for config_name, result in results.items():
-        btc_days = calculate_btc_days(result.tvl_history)
+        btc_days = result.btc_days
         op_fees = result.operational_stats.get("total_fees_btc", 0.0)
         success_rate = result.success_rate
         round_count = result.operational_stats.get("round_count", 0.0)
@@ -121,12 +139,11 @@ def print_efficiency_comparison(results: Dict[str, SimulationResult]) -> None:
             "round_count": round_count,
         })
 
-    # Sort by config name for consistent display
+    # Index by name once; sort by config name for consistent display
+    by_name = {m["name"]: m for m in metrics}
     config_order = ["Legacy", "Ark-10m", "Ark-1h", "Ark-2h"]
-    sorted_metrics = sorted(
-        metrics,
-        key=lambda x: config_order.index(x["name"]) if x["name"] in config_order else 999
-    )
+    order_rank = {name: rank for rank, name in enumerate(config_order)}
+    sorted_metrics = sorted(metrics, key=lambda x: order_rank.get(x["name"], 999))
 
     for m in sorted_metrics:
         success_rate_str = f"{m['success_rate'] * 100:.1f}%"
@@ -134,7 +151,7 @@ def print_efficiency_comparison(results: Dict[str, SimulationResult]) -> None:
         btc_days_str = f"{m['btc_days']:.2f}" if m["btc_days"] > 0 else "N/A"
         round_count_str = f"{int(m['round_count']):,}" if m["round_count"] > 0 else "N/A"
 
-        print(
+        lines.append(
             f"{m['name']:<20} "
             f"{success_rate_str:>14} "
             f"{op_fees_str:>18} "
@@ -142,54 +159,55 @@ def print_efficiency_comparison(results: Dict[str, SimulationResult]) -> None:
             f"{round_count_str:>14}"
         )
 
-    print("-" * 90)
+    lines.append("-" * 90)
 
     # Analysis and insights
-    legacy = next((m for m in metrics if m["name"] == "Legacy"), None)
-    ark_10m = next((m for m in metrics if m["name"] == "Ark-10m"), None)
-    ark_1h = next((m for m in metrics if m["name"] == "Ark-1h"), None)
-    ark_2h = next((m for m in metrics if m["name"] == "Ark-2h"), None)
+    legacy = by_name.get("Legacy")
+    ark_10m = by_name.get("Ark-10m")
+    ark_1h = by_name.get("Ark-1h")
+    ark_2h = by_name.get("Ark-2h")
 
-    print("\n" + "=" * 90)
-    print("ANALYSIS")
-    print("=" * 90)
+    lines.append("\n" + "=" * 90)
+    lines.append("ANALYSIS")
+    lines.append("=" * 90)
 
     if legacy and ark_10m:
         if ark_10m["op_fees"] < legacy["op_fees"]:
             savings = (1 - ark_10m["op_fees"] / legacy["op_fees"]) * 100
-            print(f"✓ Ark-10m undercuts Legacy by {savings:.1f}% on operational fees")
+            lines.append(f"✓ Ark-10m undercuts Legacy by {savings:.1f}% on operational fees")
         else:
             increase = (ark_10m["op_fees"] / legacy["op_fees"] - 1) * 100
-            print(f"✗ Ark-10m costs {increase:.1f}% more than Legacy on operational fees")
+            lines.append(f"✗ Ark-10m costs {increase:.1f}% more than Legacy on operational fees")
 
         if ark_10m["success_rate"] >= 0.95:
-            print(f"✓ Ark-10m maintains liquidity reliability ({ark_10m['success_rate'] * 100:.1f}% success)")
+            lines.append(f"✓ Ark-10m maintains liquidity reliability ({ark_10m['success_rate'] * 100:.1f}% success)")
         else:
-            print(f"✗ Ark-10m pool drained ({ark_10m['success_rate'] * 100:.1f}% success)")
+            lines.append(f"✗ Ark-10m pool drained ({ark_10m['success_rate'] * 100:.1f}% success)")
 
     if ark_1h and ark_10m:
         fee_reduction = (1 - ark_1h["op_fees"] / ark_10m["op_fees"]) * 100 if ark_10m["op_fees"] > 0 else 0
         success_diff = (ark_1h["success_rate"] - ark_10m["success_rate"]) * 100
-        print(f"\nArk-1h vs Ark-10m:")
-        print(f"  Fee reduction: {fee_reduction:.1f}%")
-        print(f"  Success rate change: {success_diff:+.1f}%")
+        lines.append(f"\nArk-1h vs Ark-10m:")
+        lines.append(f"  Fee reduction: {fee_reduction:.1f}%")
+        lines.append(f"  Success rate change: {success_diff:+.1f}%")
 
     if ark_2h and ark_1h:
         fee_reduction = (1 - ark_2h["op_fees"] / ark_1h["op_fees"]) * 100 if ark_1h["op_fees"] > 0 else 0
         success_diff = (ark_2h["success_rate"] - ark_1h["success_rate"]) * 100
-        print(f"\nArk-2h vs Ark-1h:")
-        print(f"  Fee reduction: {fee_reduction:.1f}%")
-        print(f"  Success rate change: {success_diff:+.1f}%")
+        lines.append(f"\nArk-2h vs Ark-1h:")
+        lines.append(f"  Fee reduction: {fee_reduction:.1f}%")
+        lines.append(f"  Success rate change: {success_diff:+.1f}%")
 
     # Find the efficiency crossover point
     viable_configs = [m for m in metrics if m["success_rate"] >= 0.95]
     if viable_configs:
         best_efficiency = min(viable_configs, key=lambda x: x["op_fees"])
-        print(f"\n{'Best Efficiency (≥95% success, lowest fees):':<50} {best_efficiency['name']}")
-        print(f"{'  → Operational Fees:':<50} {best_efficiency['op_fees']:.8f} BTC")
-        print(f"{'  → Success Rate:':<50} {best_efficiency['success_rate'] * 100:.1f}%")
+        lines.append(f"\n{'Best Efficiency (≥95% success, lowest fees):':<50} {best_efficiency['name']}")
+        lines.append(f"{'  → Operational Fees:':<50} {best_efficiency['op_fees']:.8f} BTC")
+        lines.append(f"{'  → Success Rate:':<50} {best_efficiency['success_rate'] * 100:.1f}%")
 
-    print("=" * 90 + "\n")
+    lines.append("=" * 90 + "\n")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main() -> None:
@@ -200,7 +218,9 @@ def main() -> None:
     print("#" + " " * 88 + "#")
     print("#" * 90 + "\n")
 
-    config = SimulationConfig()
+    config = SimulationConfig(
+        TOTAL_USERS=TOTAL_USERS, TARGET_TRANSACTIONS=TARGET_TRANSACTIONS
+    )
 
     # Display configuration
     print("Configuration:")
@@ -211,73 +231,39 @@ def main() -> None:
 
     # Generate user population
     print("Generating user population...")
-    users = generate_users(config)
-    user_ids = [user.user_id for user in users]
-    print(f"Generated {len(users):,} users\n")
+    population = UserPopulation.from_users(generate_users(config))
+    user_ids = population.user_ids
+    print(f"Generated {len(population):,} users\n")
 
     # Generate traffic ONCE (so all engines fight the same dataset)
     print("Generating transaction traffic (this may take a moment)...")
+    # Columnar traffic, generated as one batch and shared by every pass in memory
     generator = TrafficGenerator(config)
-    transactions = generator.generate_month_of_traffic(users)
-    print(f"Generated {len(transactions):,} transactions\n")
+    traffic = generator.generate_traffic_batch(population)
+    print(f"Generated {len(traffic):,} transactions\n")
 
-    # Convert to DataFrame and save
-    df = transactions_to_dataframe(transactions)
+    df = batch_to_dataframe(traffic)
     save_traffic_csv(df, TRAFFIC_CSV_PATH)
-
-    # Collect all results for comparison
-    results: Dict[str, SimulationResult] = {}
-
-    # Pass 1: Legacy Refill (Baseline)
-    print("=" * 90)
-    print("PASS 1: Legacy Refill (Baseline)")
-    print("=" * 90)
-    legacy_refill_engine = LegacyRefillEngine(user_ids)
-    legacy_refill_runner = SimulationRunner(TRAFFIC_CSV_PATH, legacy_refill_engine)
-    legacy_refill_result = legacy_refill_runner.run()
-    results["Legacy"] = legacy_refill_result
-    print(f"Success Rate: {legacy_refill_result.success_rate * 100:.1f}%")
-    print(f"Op Fees: {legacy_refill_result.operational_stats.get('total_fees_btc', 0.0):.8f} BTC")
-    print(f"BTC-Days: {calculate_btc_days(legacy_refill_result.tvl_history):.2f}\n")
-
-    # Pass 2: Ark (10 Minute Rounds)
-    print("=" * 90)
-    print("PASS 2: Ark (10 Minute Rounds)")
-    print("=" * 90)
-    ark_10m_engine = ArkEngine(user_ids, round_interval=600)
-    ark_10m_runner = SimulationRunner(TRAFFIC_CSV_PATH, ark_10m_engine)
-    ark_10m_result = ark_10m_runner.run()
-    results["Ark-10m"] = ark_10m_result
-    print(f"Success Rate: {ark_10m_result.success_rate * 100:.1f}%")
-    print(f"Op Fees: {ark_10m_result.operational_stats.get('total_fees_btc', 0.0):.8f} BTC")
-    print(f"BTC-Days: {calculate_btc_days(ark_10m_result.tvl_history):.2f}")
-    print(f"Round Count: {int(ark_10m_result.operational_stats.get('round_count', 0)):,}\n")
-
-    # Pass 3: Ark (1 Hour Rounds)
-    print("=" * 90)
-    print("PASS 3: Ark (1 Hour Rounds)")
-    print("=" * 90)
-    ark_1h_engine = ArkEngine(user_ids, round_interval=3600)
-    ark_1h_runner = SimulationRunner(TRAFFIC_CSV_PATH, ark_1h_engine)
-    ark_1h_result = ark_1h_runner.run()
-    results["Ark-1h"] = ark_1h_result
-    print(f"Success Rate: {ark_1h_result.success_rate * 100:.1f}%")
-    print(f"Op Fees: {ark_1h_result.operational_stats.get('total_fees_btc', 0.0):.8f} BTC")
-    print(f"BTC-Days: {calculate_btc_days(ark_1h_result.tvl_history):.2f}")
-    print(f"Round Count: {int(ark_1h_result.operational_stats.get('round_count', 0)):,}\n")
-
-    # Pass 4: Ark (2 Hour Rounds)
-    print("=" * 90)
-    print("PASS 4: Ark (2 Hour Rounds)")
-    print("=" * 90)
-    ark_2h_engine = ArkEngine(user_ids, round_interval=7200)
-    ark_2h_runner = SimulationRunner(TRAFFIC_CSV_PATH, ark_2h_engine)
-    ark_2h_result = ark_2h_runner.run()
-    results["Ark-2h"] = ark_2h_result
-    print(f"Success Rate: {ark_2h_result.success_rate * 100:.1f}%")
-    print(f"Op Fees: {ark_2h_result.operational_stats.get('total_fees_btc', 0.0):.8f} BTC")
-    print(f"BTC-Days: {calculate_btc_days(ark_2h_result.tvl_history):.2f}")
-    print(f"Round Count: {int(ark_2h_result.operational_stats.get('round_count', 0)):,}\n")
+    save_traffic_parquet(df, TRAFFIC_PARQUET_PATH)
+
+    # Run all passes over the same traffic (in parallel where cores allow)
+    engine_factories: Dict[str, EngineFactory] = {
+        "Legacy": partial(LegacyRefillEngine, user_ids),
+        "Ark-10m": partial(
+            ArkEngine, user_ids, pool_capacity=ARK_POOL_CAPACITY, round_interval=600
+        ),
+        "Ark-1h": partial(
+            ArkEngine, user_ids, pool_capacity=ARK_POOL_CAPACITY, round_interval=3600
+        ),
+        "Ark-2h": partial(
+            ArkEngine, user_ids, pool_capacity=ARK_POOL_CAPACITY, round_interval=7200
+        ),
+    }
+    print(f"Running {len(engine_factories)} simulation passes...\n")
+    results: Dict[str, SimulationResult] = run_engines(engine_factories, traffic)
+
+    for pass_number, (name, result) in enumerate(results.items(), start=1):
+        print_pass_result(pass_number, PASS_TITLES[name], result)
 
     # Print comparison table
     print_efficiency_comparison(results)
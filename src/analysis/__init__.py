@@ -1,7 +1,17 @@
 """Analysis module for metrics calculation and visualization."""
 
+from typing import Any
+
 from src.analysis.metrics import calculate_btc_days
-from src.analysis.plotting import plot_comparison
 
 __all__ = ["calculate_btc_days", "plot_comparison"]
 
+
+def __getattr__(name: str) -> Any:
+    """Import plotting (and matplotlib) only when plot_comparison is first used."""
+    if name == "plot_comparison":
+        from src.analysis.plotting import plot_comparison
+
+        return plot_comparison
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
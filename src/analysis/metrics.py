@@ -2,11 +2,51 @@
 
 from typing import List, Tuple
 
+import numpy as np
+
+from src.models import TVLHistory
+
+try:
+    from numba import config as numba_config, njit
+except ImportError:  # numba is optional; the NumPy kernel below is used instead
+    njit = None
+else:
+    if numba_config.DISABLE_JIT:  # the interpreted loop is slower than NumPy
+        njit = None
+
 SECONDS_PER_DAY: int = 86400
 SATS_PER_BTC: int = 100_000_000
 
 
-def calculate_btc_days(tvl_history: List[Tuple[float, float]]) -> float:
+def _sat_seconds_numpy(timestamps: np.ndarray, tvl: np.ndarray) -> float:
+    """Left Riemann sum of tvl over timestamps via np.diff and one dot product."""
+    time_deltas = np.diff(timestamps)
+    np.maximum(time_deltas, 0.0, out=time_deltas)
+    return float(np.dot(tvl[:-1], time_deltas))
+
+
+def _sat_seconds_loop(timestamps: np.ndarray, tvl: np.ndarray) -> float:
+    """Left Riemann sum in one pass with no interval temporary (compiled by numba)."""
+    total = 0.0
+    for i in range(1, timestamps.shape[0]):
+        dt = timestamps[i] - timestamps[i - 1]
+        if dt > 0.0:
+            total += tvl[i - 1] * dt
+    return total
+
+
+# Reassociation lets LLVM vectorize the reduction, like the BLAS dot does;
+# NaN/inf semantics are left alone
+_sat_seconds = (
+    njit(cache=True, fastmath={"reassoc", "contract"})(_sat_seconds_loop)
+    if njit is not None
+    else _sat_seconds_numpy
+)
+
+
+def calculate_btc_days(
+    tvl_history: TVLHistory | List[Tuple[float, float]] | np.ndarray,
+) -> float:
     """
     Calculate the BTC-Days metric from TVL history.
 
@@ -14,27 +54,33 @@ def calculate_btc_days(tvl_history: List[Tuple[float, float]]) -> float:
     the integral of TVL (in BTC) over time (in days). Lower values indicate
     more capital-efficient systems.
 
+    The sum is evaluated as a single vectorized dot product over the
+    interval lengths rather than a per-step Python loop, or as a compiled
+    single-pass loop when numba is installed.
+
     Args:
-        tvl_history: List of (timestamp, tvl_in_sats) tuples, sorted by timestamp.
+        tvl_history: (timestamp, tvl_in_sats) samples sorted by timestamp, as a
+            TVLHistory, a list of tuples or an (N, 2) array.
 
     Returns:
         Total BTC-Days as a float. Returns 0.0 if history has fewer than 2 points.
     """
-    if len(tvl_history) < 2:
+    history = TVLHistory.coerce(tvl_history)
+    if len(history) < 2:
         return 0.0
 
-    total_sat_seconds = 0.0
+    timestamps = history.timestamps
+    tvl = history.tvl
 
-    for i in range(1, len(tvl_history)):
-        prev_timestamp, prev_tvl = tvl_history[i - 1]
-        curr_timestamp, _ = tvl_history[i]
+    # Engines that never lock capital (e.g. Passthrough) record all-zero TVL;
+    # skip building the interval array for them
+    if not tvl[:-1].any():
+        return 0.0
 
-        time_delta_seconds = curr_timestamp - prev_timestamp
-        if time_delta_seconds > 0:
-            # Use the TVL at the start of the interval (left Riemann sum)
-            total_sat_seconds += prev_tvl * time_delta_seconds
+    # Use the TVL at the start of each interval (left Riemann sum); intervals
+    # with non-positive duration contribute nothing.
+    total_sat_seconds = float(_sat_seconds(timestamps, tvl))
 
     # Convert sat-seconds to BTC-days
     btc_days = total_sat_seconds / SATS_PER_BTC / SECONDS_PER_DAY
     return btc_days
-
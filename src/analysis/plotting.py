@@ -1,16 +1,31 @@
 """Visualization functions for simulation results."""
 
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib import style
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
-from src.analysis.metrics import calculate_btc_days
 from src.simulation.runner import SimulationResult
 
 SECONDS_PER_DAY: int = 86400
 SATS_PER_BTC: int = 100_000_000
 
+# Fixed number of points each TVL curve is resampled to, whatever the history length
+TVL_PLOT_POINTS: int = 1000
+
+# Applied with style.context around each chart, so rcParams are not changed globally
+PLOT_STYLE: str = "seaborn-v0_8-whitegrid"
+
+# Screen resolution for the comparison charts; encode cost grows with dpi squared
+PLOT_DPI: int = 100
+
+# Faster zlib level for PNG output; flat-colour plots barely grow in size
+PNG_PIL_KWARGS: Dict[str, object] = {"compress_level": 3, "optimize": False}
+
 # Color palette for consistent engine styling
 ENGINE_COLORS: Dict[str, str] = {
     "Passthrough": "#6B7280",  # Gray
@@ -42,34 +57,72 @@ def plot_comparison(
         output_dir: Directory path to save the generated plots.
         filename_suffix: Optional suffix for output filenames (e.g., "_1000_users").
     """
+    for path in render_comparison(results, output_dir, filename_suffix):
+        print(f"Saved: {path}")
+
+
+def render_comparison(
+    results: Dict[str, SimulationResult],
+    output_dir: str,
+    filename_suffix: str = "",
+) -> List[Path]:
+    """
+    Save the plot_comparison charts without printing, and return their paths.
+
+    Figures are built through the object-oriented API rather than pyplot's
+    global state, so this can run on a background thread while the caller
+    carries on (see main.py).
+
+    Args:
+        results: Dictionary mapping engine name to SimulationResult.
+        output_dir: Directory path to save the generated plots.
+        filename_suffix: Optional suffix for output filenames (e.g., "_1000_users").
+
+    Returns:
+        Paths of the saved PNG files, in creation order.
+    """
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
-    _plot_tvl_comparison(results, output_path, filename_suffix)
-    _plot_cost_tradeoff(results, output_path, filename_suffix)
+    return [
+        _plot_tvl_comparison(results, output_path, filename_suffix),
+        _plot_cost_tradeoff(results, output_path, filename_suffix),
+    ]
 
 
 def _plot_tvl_comparison(
     results: Dict[str, SimulationResult],
     output_path: Path,
     filename_suffix: str = "",
-) -> None:
-    """Generate TVL over time comparison chart."""
-    plt.style.use("seaborn-v0_8-whitegrid")
-    fig, ax = plt.subplots(figsize=(12, 6))
+) -> Path:
+    """Generate TVL over time comparison chart and return its path."""
+    with style.context(PLOT_STYLE):
+        fig = Figure(figsize=(12, 6))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        _draw_tvl_comparison(ax, results)
+
+        path = output_path / f"tvl_comparison{filename_suffix}.png"
+        # tight_layout already fits the labels, so savefig needs no second
+        # bbox_inches="tight" render pass
+        fig.tight_layout()
+        fig.savefig(path, dpi=PLOT_DPI, pil_kwargs=PNG_PIL_KWARGS)
+    return path
+
+
+def _draw_tvl_comparison(ax: Axes, results: Dict[str, SimulationResult]) -> None:
+    """Draw one resampled TVL line per engine onto ax."""
 
     for engine_name, result in results.items():
-        if not result.tvl_history:
+        history = result.tvl_history
+        if len(history) == 0:
             continue
 
-        # Convert timestamps to days and TVL to BTC
-        days = [(ts / SECONDS_PER_DAY) for ts, _ in result.tvl_history]
-        tvl_btc = [(tvl / SATS_PER_BTC) for _, tvl in result.tvl_history]
-
-        # Downsample for cleaner plotting (every 100th point)
-        sample_rate = max(1, len(days) // 1000)
-        days_sampled = days[::sample_rate]
-        tvl_sampled = tvl_btc[::sample_rate]
+        # Resample onto an evenly spaced grid, then convert to days and BTC
+        timestamps = history.timestamps
+        grid = np.linspace(timestamps[0], timestamps[-1], TVL_PLOT_POINTS)
+        days_sampled = grid / SECONDS_PER_DAY
+        tvl_sampled = np.interp(grid, timestamps, history.tvl) / SATS_PER_BTC
 
         color = _get_engine_color(engine_name)
         ax.plot(
@@ -88,35 +141,40 @@ def _plot_tvl_comparison(
     ax.set_xlim(left=0)
     ax.set_ylim(bottom=0)
 
-    filename = f"tvl_comparison{filename_suffix}.png"
-    plt.tight_layout()
-    plt.savefig(output_path / filename, dpi=150, bbox_inches="tight")
-    plt.close(fig)
-    print(f"Saved: {output_path / filename}")
-
 
 def _plot_cost_tradeoff(
     results: Dict[str, SimulationResult],
     output_path: Path,
     filename_suffix: str = "",
-) -> None:
-    """Generate cost tradeoff bar chart (BTC-Days vs Operational Fees)."""
-    plt.style.use("seaborn-v0_8-whitegrid")
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-
+) -> Path:
+    """Generate cost tradeoff bar chart (BTC-Days vs Operational Fees) and return its path."""
+    with style.context(PLOT_STYLE):
+        fig = Figure(figsize=(14, 6))
+        FigureCanvasAgg(fig)
+        ax1, ax2 = fig.subplots(1, 2)
+        _draw_cost_tradeoff(ax1, ax2, results)
+
+        path = output_path / f"cost_tradeoff{filename_suffix}.png"
+        fig.tight_layout()
+        fig.savefig(path, dpi=PLOT_DPI, pil_kwargs=PNG_PIL_KWARGS)
+    return path
+
+
+def _draw_cost_tradeoff(ax1: Axes, ax2: Axes, results: Dict[str, SimulationResult]) -> None:
+    """Draw the BTC-Days bars onto ax1 and the operational fee bars onto ax2."""
     engine_names = list(results.keys())
-    btc_days_values = []
-    op_fees_values = []
-    colors = []
 
-    for engine_name in engine_names:
-        result = results[engine_name]
-        btc_days = calculate_btc_days(result.tvl_history)
-        op_fees = result.operational_stats.get("total_fees_btc", 0.0)
-
-        btc_days_values.append(btc_days)
-        op_fees_values.append(op_fees)
-        colors.append(_get_engine_color(engine_name))
+    # One pass gathers every bar's inputs; btc_days is cached on the result,
+    # so engines already reported on are not re-integrated here
+    rows = [
+        (
+            result.btc_days,
+            result.operational_stats.get("total_fees_btc", 0.0),
+            _get_engine_color(engine_name),
+        )
+        for engine_name, result in results.items()
+    ]
+    btc_days_values, op_fees_values, colors = zip(*rows) if rows else ((), (), ())
 
     x_positions = range(len(engine_names))
 
@@ -167,9 +225,3 @@ def _plot_cost_tradeoff(
             fontweight="bold",
         )
 
-    filename = f"cost_tradeoff{filename_suffix}.png"
-    plt.tight_layout()
-    plt.savefig(output_path / filename, dpi=150, bbox_inches="tight")
-    plt.close(fig)
-    print(f"Saved: {output_path / filename}")
-
@@ -0,0 +1,216 @@
+"""Compiled batch loops for the Legacy, LegacyRefill and Ark engines.
+
+The loops mirror the engines' process_raw methods row for row, but work on
+int64 balance arrays indexed by user position instead of per-user Python
+state. They are compiled with numba when it is installed; otherwise, or when
+NUMBA_DISABLE_JIT is set, legacy_run and ark_run are None and the engines
+keep their per-row Python path.
+
+The first call in a process compiles the kernel (on the order of a second);
+cache=True stores the machine code in __pycache__, so later processes only
+load it.
+"""
+
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from src.models import TRANSACTION_TYPE_CODES, TransactionType
+
+try:
+    from numba import config as numba_config, njit
+except ImportError:  # numba is optional; engines fall back to process_raw
+    njit = None
+else:
+    if numba_config.DISABLE_JIT:  # njit would hand back the uncompiled loops
+        njit = None
+
+_INTERNAL_CODE: int = TRANSACTION_TYPE_CODES[TransactionType.INTERNAL]
+_INBOUND_CODE: int = TRANSACTION_TYPE_CODES[TransactionType.EXTERNAL_INBOUND]
+_OUTBOUND_CODE: int = TRANSACTION_TYPE_CODES[TransactionType.EXTERNAL_OUTBOUND]
+
+# refill_target for channel engines without JIT refills (plain LegacyEngine)
+NO_REFILL: int = -1
+
+
+def index_of(sorted_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """
+    Map user IDs to their positions in sorted_ids, with -1 for unknown IDs.
+
+    Args:
+        sorted_ids: Registered user IDs in ascending order.
+        ids: User IDs to look up (e.g. a batch's sender column).
+
+    Returns:
+        int64 array of positions aligned with ids.
+    """
+    if len(sorted_ids) == 0:
+        return np.full(len(ids), -1, dtype=np.int64)
+    positions = np.searchsorted(sorted_ids, ids)
+    np.minimum(positions, len(sorted_ids) - 1, out=positions)
+    return np.where(sorted_ids[positions] == ids, positions, -1).astype(np.int64)
+
+
+def user_positions(user_ids: Sequence[int] | np.ndarray) -> Tuple[np.ndarray, Dict[int, int]]:
+    """
+    Sorted, de-duplicated user IDs and the ID -> position dict engines index with.
+
+    IDs that are already strictly increasing (such as generate_users' 0..n-1)
+    skip the np.unique sort, which dominates engine setup at large user counts.
+
+    Args:
+        user_ids: User IDs in any order, possibly repeated.
+
+    Returns:
+        Tuple of (int64 ID array in ascending order, dict mapping each ID to
+        its position in that array).
+    """
+    ids = np.asarray(user_ids, dtype=np.int64).ravel()
+    if not (ids[1:] > ids[:-1]).all():
+        ids = np.unique(ids)
+    return ids, dict(zip(ids.tolist(), range(len(ids))))
+
+
+def mirrors(cls: type, kernel_cls: type, method_names: Tuple[str, ...]) -> bool:
+    """
+    Whether cls inherits every named method from kernel_cls unchanged.
+
+    A kernel reproduces only the handlers of the class it was written for,
+    so a subclass that overrides any of them must keep the per-row path.
+
+    Args:
+        cls: The engine's runtime class, type(self).
+        kernel_cls: The engine class the kernel mirrors.
+        method_names: The methods the kernel reimplements.
+
+    Returns:
+        True if the kernel gives the same results as cls's own methods.
+    """
+    return all(getattr(cls, name) is getattr(kernel_cls, name) for name in method_names)
+
+
+def _legacy_loop(
+    codes: np.ndarray,
+    senders: np.ndarray,
+    receivers: np.ndarray,
+    amounts: np.ndarray,
+    local: np.ndarray,
+    remote: np.ndarray,
+    total_local: int,
+    refill_target: int,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Apply a batch to per-channel local/remote arrays in place.
+
+    With refill_target >= 0 the receiver's channel is topped up to
+    max(refill_target, amount) before an inbound or payable internal
+    transaction it cannot cover (see LegacyRefillEngine); NO_REFILL gives
+    plain LegacyEngine behaviour. Returns the success mask, the TVL trace
+    and the number of refills.
+    """
+    count = codes.shape[0]
+    success = np.zeros(count, dtype=np.bool_)
+    tvl = np.empty(count, dtype=np.float64)
+    refill_count = 0
+    for i in range(count):
+        code = codes[i]
+        amount = amounts[i]
+        if refill_target >= 0 and code != _OUTBOUND_CODE:
+            r = receivers[i]
+            if r >= 0 and local[r] < amount:
+                s = senders[i]
+                # Internal transfers only refill when the sender can pay
+                if code == _INBOUND_CODE or (s >= 0 and remote[s] >= amount):
+                    top_up = max(refill_target, amount) - local[r]
+                    local[r] += top_up
+                    total_local += top_up
+                    refill_count += 1
+        if code == _OUTBOUND_CODE:
+            s = senders[i]
+            if s >= 0 and remote[s] >= amount:
+                remote[s] -= amount
+                local[s] += amount
+                total_local += amount
+                success[i] = True
+        elif code == _INBOUND_CODE:
+            r = receivers[i]
+            if r >= 0 and local[r] >= amount:
+                local[r] -= amount
+                remote[r] += amount
+                total_local -= amount
+                success[i] = True
+        elif code == _INTERNAL_CODE:
+            s = senders[i]
+            r = receivers[i]
+            if s >= 0 and r >= 0 and remote[s] >= amount and local[r] >= amount:
+                remote[s] -= amount
+                local[s] += amount
+                local[r] -= amount
+                remote[r] += amount
+                success[i] = True
+        tvl[i] = total_local
+    return success, tvl, refill_count
+
+
+def _ark_loop(
+    codes: np.ndarray,
+    senders: np.ndarray,
+    receivers: np.ndarray,
+    amounts: np.ndarray,
+    timestamps: np.ndarray,
+    balances: np.ndarray,
+    pool_balance: int,
+    last_round_time: float,
+    round_count: int,
+    round_interval: int,
+) -> Tuple[np.ndarray, np.ndarray, int, float, int, np.ndarray]:
+    """
+    Apply a batch to per-user balances in place (see ArkEngine).
+
+    Returns the success mask and TVL trace followed by the updated pool
+    balance, round clock, round count and the pool samples taken at round
+    boundaries.
+    """
+    count = codes.shape[0]
+    success = np.zeros(count, dtype=np.bool_)
+    tvl = np.empty(count, dtype=np.float64)
+    # At most one sample per transaction
+    samples = np.empty(count, dtype=np.int64)
+    sample_count = 0
+    for i in range(count):
+        timestamp = timestamps[i]
+        if timestamp > last_round_time:
+            rounds_passed = int((timestamp - last_round_time) // round_interval)
+            if rounds_passed > 0:
+                round_count += rounds_passed
+                last_round_time += rounds_passed * round_interval
+                samples[sample_count] = pool_balance
+                sample_count += 1
+
+        code = codes[i]
+        amount = amounts[i]
+        if code == _OUTBOUND_CODE:
+            s = senders[i]
+            if s >= 0 and balances[s] >= amount and pool_balance >= amount:
+                balances[s] -= amount
+                pool_balance -= amount
+                success[i] = True
+        elif code == _INBOUND_CODE:
+            r = receivers[i]
+            if r >= 0:
+                balances[r] += amount
+                pool_balance += amount
+                success[i] = True
+        elif code == _INTERNAL_CODE:
+            s = senders[i]
+            r = receivers[i]
+            if s >= 0 and r >= 0 and balances[s] >= amount:
+                balances[s] -= amount
+                balances[r] += amount
+                success[i] = True
+        tvl[i] = pool_balance
+    return success, tvl, pool_balance, last_round_time, round_count, samples[:sample_count]
+
+
+legacy_run = njit(cache=True)(_legacy_loop) if njit is not None else None
+ark_run = njit(cache=True)(_ark_loop) if njit is not None else None
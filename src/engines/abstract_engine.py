@@ -1,9 +1,11 @@
 """Abstract base class for LSP (Lightning Service Provider) engines."""
 
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Tuple
 
-from src.models import Transaction
+import numpy as np
+
+from src.models import Transaction, TransactionBatch
 
 
 class AbstractLSPEngine(ABC):
@@ -12,8 +14,13 @@ class AbstractLSPEngine(ABC):
 
     All engine implementations must provide transaction processing,
     TVL (Total Value Locked) tracking, and identification.
+
+    The base declares no instance state, so engines that list their
+    attributes in __slots__ carry no per-instance __dict__.
     """
 
+    __slots__ = ()
+
     @abstractmethod
     def process_transaction(self, tx: Transaction) -> bool:
         """
@@ -26,6 +33,32 @@ class AbstractLSPEngine(ABC):
             True if the transaction was processed successfully, False otherwise.
         """
 
+    def process_batch(self, batch: TransactionBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Process a block of transactions in timestamp order.
+
+        The default feeds each row to process_transaction and samples TVL
+        after it. Engines whose outcomes can be computed with array operations
+        should override this to skip the per-row Python dispatch.
+
+        Args:
+            batch: The transactions to process.
+
+        Returns:
+            Tuple of (success mask as a bool array, TVL after each transaction
+            as a float64 array), both aligned with the batch.
+        """
+        count = len(batch)
+        success = np.empty(count, dtype=bool)
+        tvl = np.empty(count, dtype=np.float64)
+        # Bound once, not looked up on every row
+        process_transaction = self.process_transaction
+        get_current_tvl = self.get_current_tvl
+        for i, tx in enumerate(batch.iter_transactions()):
+            success[i] = process_transaction(tx)
+            tvl[i] = get_current_tvl()
+        return success, tvl
+
     @abstractmethod
     def get_current_tvl(self) -> float:
         """
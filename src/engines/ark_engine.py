@@ -1,6 +1,9 @@
 """Ark protocol engine with pooled liquidity and round-based settlement."""
 
-from typing import Dict, List
+from array import array
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
 
 from src.config import (
     ARK_POOL_CAPACITY,
@@ -9,12 +12,22 @@ from src.config import (
     LEGACY_CHANNEL_CAPACITY,
     LEGACY_INITIAL_SPLIT,
 )
+from src.engines import _kernels
 from src.engines.abstract_engine import AbstractLSPEngine
-from src.models import Transaction, TransactionType
+from src.models import (
+    TRANSACTION_TYPE_CODES,
+    TRANSACTION_TYPES,
+    Transaction,
+    TransactionBatch,
+    TransactionType,
+)
 
 
 SATS_PER_BTC: int = 100_000_000
 
+# Handlers take (sender_id, receiver_id, amount) and return success
+_Handler = Callable[[int, int, int], bool]
+
 
 class ArkEngine(AbstractLSPEngine):
     """
@@ -28,11 +41,37 @@ class ArkEngine(AbstractLSPEngine):
     - Pool liquidity is shared across all users (capital efficient)
     - Internal transfers require no pool liquidity (instant, free)
     - Settlement happens in periodic rounds (batched on-chain)
+
+    User balances are held in a list indexed by the user's position in the
+    sorted user IDs, rather than a dict keyed by user ID.
     """
 
+    __slots__ = (
+        "_pool_capacity",
+        "_pool_balance",
+        "_user_ids",
+        "_user_idx",
+        "_balances",
+        "_round_interval",
+        "_last_round_time",
+        "_next_round_time",
+        "_round_count",
+        "_tvl_samples",
+        "_handlers",
+    )
+
+    # Methods the compiled pool kernel reimplements for whole batches
+    _KERNEL_METHODS: Tuple[str, ...] = (
+        "process_raw",
+        "_check_round",
+        "_process_internal",
+        "_process_external_inbound",
+        "_process_external_outbound",
+    )
+
     def __init__(
         self,
-        user_ids: List[int],
+        user_ids: Sequence[int] | np.ndarray,
         pool_capacity: int = ARK_POOL_CAPACITY,
         user_initial_balance: int | None = None,
         round_interval: int | None = None,
@@ -41,7 +80,7 @@ class ArkEngine(AbstractLSPEngine):
         Initialize Ark engine with shared pool and user balances.
 
         Args:
-            user_ids: List of user IDs to register.
+            user_ids: User IDs to register (list or integer array).
             pool_capacity: Total ASP pool capacity in sats.
             user_initial_balance: Initial balance per user in sats.
                 Defaults to LEGACY_CHANNEL_CAPACITY * (1 - LEGACY_INITIAL_SPLIT)
@@ -58,17 +97,29 @@ class ArkEngine(AbstractLSPEngine):
                 LEGACY_CHANNEL_CAPACITY * (1 - LEGACY_INITIAL_SPLIT)
             )
 
-        self._user_balances: Dict[int, int] = {
-            user_id: user_initial_balance for user_id in user_ids
-        }
+        # Sorted, de-duplicated IDs; position i holds user _user_ids[i]
+        self._user_ids, self._user_idx = _kernels.user_positions(user_ids)
+        self._balances: List[int] = [user_initial_balance] * len(self._user_ids)
 
         # Round tracking
         self._round_interval = round_interval if round_interval is not None else ARK_ROUND_INTERVAL
         self._last_round_time: float = 0.0
+        # Earliest timestamp that settles a new round, so the common case in
+        # _check_round is a single comparison
+        self._next_round_time: float = self._last_round_time + self._round_interval
         self._round_count: int = 0
 
-        # For avg TVL tracking
-        self._tvl_samples: List[int] = [pool_capacity]
+        # For avg TVL tracking: pool balance at start and at each round, as
+        # packed int64 (8 bytes per sample rather than a boxed int)
+        self._tvl_samples: array = array("q", (pool_capacity,))
+
+        # Dispatch table indexed by transaction type code
+        handlers: Dict[TransactionType, _Handler] = {
+            TransactionType.INTERNAL: self._process_internal,
+            TransactionType.EXTERNAL_INBOUND: self._process_external_inbound,
+            TransactionType.EXTERNAL_OUTBOUND: self._process_external_outbound,
+        }
+        self._handlers: Tuple[_Handler, ...] = tuple(handlers[t] for t in TRANSACTION_TYPES)
 
     def process_transaction(self, tx: Transaction) -> bool:
         """
@@ -80,15 +131,125 @@ class ArkEngine(AbstractLSPEngine):
         Returns:
             True if successful, False if insufficient balance/liquidity.
         """
-        self._check_round(tx.timestamp)
+        return self.process_raw(
+            TRANSACTION_TYPE_CODES[tx.tx_type],
+            tx.sender_id,
+            tx.receiver_id,
+            tx.amount_sats,
+            tx.timestamp,
+        )
+
+    def process_raw(
+        self,
+        tx_type_code: int,
+        sender_id: int,
+        receiver_id: int,
+        amount_sats: int,
+        timestamp: float,
+    ) -> bool:
+        """
+        Process a transaction given as primitive values, without a Transaction.
+
+        Args:
+            tx_type_code: Index into TRANSACTION_TYPES.
+            sender_id: Sending user ID.
+            receiver_id: Receiving user ID.
+            amount_sats: Amount in sats.
+            timestamp: Seconds since simulation start, used for round tracking.
+
+        Returns:
+            True if successful, False if insufficient balance/liquidity.
+        """
+        self._check_round(timestamp)
+        return self._handlers[tx_type_code](sender_id, receiver_id, amount_sats)
 
-        if tx.tx_type == TransactionType.EXTERNAL_OUTBOUND:
-            return self._process_external_outbound(tx.sender_id, tx.amount_sats)
-        elif tx.tx_type == TransactionType.EXTERNAL_INBOUND:
-            return self._process_external_inbound(tx.receiver_id, tx.amount_sats)
-        elif tx.tx_type == TransactionType.INTERNAL:
-            return self._process_internal(tx.sender_id, tx.receiver_id, tx.amount_sats)
-        return False
+    def process_batch(self, batch: TransactionBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Process a batch with the compiled pool kernel when numba is installed.
+
+        The balance list is copied into an array, updated by the kernel
+        alongside the pool and round state, and copied back. Without numba,
+        or for a subclass that overrides one of the _KERNEL_METHODS, rows go
+        through the handler table instead.
+
+        Args:
+            batch: The transactions to process.
+
+        Returns:
+            Tuple of (success mask, TVL after each transaction).
+        """
+        if _kernels.ark_run is None or not _kernels.mirrors(
+            type(self), ArkEngine, self._KERNEL_METHODS
+        ):
+            return self._process_batch_raw(batch)
+
+        balances = np.array(self._balances, dtype=np.int64)
+
+        (
+            success,
+            tvl,
+            pool_balance,
+            last_round_time,
+            round_count,
+            samples,
+        ) = _kernels.ark_run(
+            batch.tx_type_codes,
+            _kernels.index_of(self._user_ids, batch.sender_ids),
+            _kernels.index_of(self._user_ids, batch.receiver_ids),
+            batch.amount_sats,
+            batch.timestamps,
+            balances,
+            self._pool_balance,
+            self._last_round_time,
+            self._round_count,
+            self._round_interval,
+        )
+
+        self._balances = balances.tolist()
+        self._pool_balance = int(pool_balance)
+        self._last_round_time = float(last_round_time)
+        self._next_round_time = self._last_round_time + self._round_interval
+        self._round_count = int(round_count)
+        self._tvl_samples.frombytes(samples.tobytes())
+        return success, tvl
+
+    def _process_batch_raw(self, batch: TransactionBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dispatch the batch row by row, checking for rounds only at boundary rows.
+
+        For a batch in timestamp order, the first row at or past the next
+        round boundary is found with a binary search. Rows before it cannot
+        settle a round and skip _check_round entirely. An unsorted batch
+        checks for a round before every row, like process_transaction.
+        """
+        count = len(batch)
+        success = np.empty(count, dtype=bool)
+        tvl = np.empty(count, dtype=np.float64)
+        timestamps = batch.timestamps
+        times = timestamps.tolist()
+        codes = batch.tx_type_codes.tolist()
+        senders = batch.sender_ids.tolist()
+        receivers = batch.receiver_ids.tolist()
+        amounts = batch.amount_sats.tolist()
+        handlers = self._handlers
+
+        if not (timestamps[1:] >= timestamps[:-1]).all():
+            check_round = self._check_round
+            for i in range(count):
+                check_round(times[i])
+                success[i] = handlers[codes[i]](senders[i], receivers[i], amounts[i])
+                tvl[i] = self._pool_balance
+            return success, tvl
+
+        row = 0
+        while row < count:
+            self._check_round(times[row])
+            stop = row + 1 + int(np.searchsorted(timestamps[row + 1:], self._next_round_time))
+            for i in range(row, stop):
+                success[i] = handlers[codes[i]](senders[i], receivers[i], amounts[i])
+                tvl[i] = self._pool_balance
+            row = stop
+        return success, tvl
 
     def _check_round(self, current_time: float) -> None:
         """
@@ -97,7 +258,7 @@ class ArkEngine(AbstractLSPEngine):
         Args:
             current_time: Current simulation timestamp in seconds.
         """
-        if current_time <= self._last_round_time:
+        if current_time < self._next_round_time:
             return
 
         elapsed = current_time - self._last_round_time
@@ -106,36 +267,38 @@ class ArkEngine(AbstractLSPEngine):
         if rounds_passed > 0:
             self._round_count += rounds_passed
             self._last_round_time += rounds_passed * self._round_interval
+            self._next_round_time = self._last_round_time + self._round_interval
             self._tvl_samples.append(self._pool_balance)
 
-    def _process_external_outbound(self, sender_id: int, amount: int) -> bool:
+    def _process_external_outbound(self, sender_id: int, receiver_id: int, amount: int) -> bool:
         """
         Process user sending to external world.
 
         Requires both user balance AND pool liquidity (ASP pays the world).
         """
-        user_balance = self._user_balances.get(sender_id)
-        if user_balance is None or user_balance < amount:
+        i = self._user_idx.get(sender_id)
+        if i is None or self._balances[i] < amount:
             return False
 
         if self._pool_balance < amount:
             return False
 
-        self._user_balances[sender_id] -= amount
+        self._balances[i] -= amount
         self._pool_balance -= amount
         return True
 
-    def _process_external_inbound(self, receiver_id: int, amount: int) -> bool:
+    def _process_external_inbound(self, sender_id: int, receiver_id: int, amount: int) -> bool:
         """
         Process external world sending to user.
 
         ASP receives real BTC (pool grows) and credits user's virtual balance.
         No cap enforced - ASP can always accept inbound liquidity.
         """
-        if receiver_id not in self._user_balances:
+        i = self._user_idx.get(receiver_id)
+        if i is None:
             return False
 
-        self._user_balances[receiver_id] += amount
+        self._balances[i] += amount
         self._pool_balance += amount
         return True
 
@@ -146,15 +309,16 @@ class ArkEngine(AbstractLSPEngine):
         Key advantage: NO pool liquidity required! Funds stay inside ASP,
         just moving between user virtual balances.
         """
-        sender_balance = self._user_balances.get(sender_id)
-        if sender_balance is None or sender_balance < amount:
+        s = self._user_idx.get(sender_id)
+        if s is None or self._balances[s] < amount:
             return False
 
-        if receiver_id not in self._user_balances:
+        r = self._user_idx.get(receiver_id)
+        if r is None:
             return False
 
-        self._user_balances[sender_id] -= amount
-        self._user_balances[receiver_id] += amount
+        self._balances[s] -= amount
+        self._balances[r] += amount
         return True
 
     def get_current_tvl(self) -> float:
@@ -187,7 +351,9 @@ class ArkEngine(AbstractLSPEngine):
                 - avg_tvl: Average TVL across the simulation
         """
         total_fees_sats = self._round_count * ARK_ROUND_COST_SATS
-        avg_tvl = sum(self._tvl_samples) / len(self._tvl_samples) if self._tvl_samples else 0.0
+        samples = np.frombuffer(self._tvl_samples, dtype=np.int64)
+        # Exact integer sum, then one division, as with Python's sum()
+        avg_tvl = int(samples.sum()) / len(samples) if len(samples) else 0.0
 
         return {
             "round_count": float(self._round_count),
@@ -205,7 +371,8 @@ class ArkEngine(AbstractLSPEngine):
         Returns:
             User's balance in sats or None if user not found.
         """
-        return self._user_balances.get(user_id)
+        i = self._user_idx.get(user_id)
+        return self._balances[i] if i is not None else None
 
     def get_pool_balance(self) -> int:
         """Get the current pool balance."""
@@ -213,5 +380,5 @@ class ArkEngine(AbstractLSPEngine):
 
     def get_total_user_count(self) -> int:
         """Get the number of registered users."""
-        return len(self._user_balances)
+        return len(self._user_ids)
 
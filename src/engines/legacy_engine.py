@@ -1,10 +1,22 @@
 """Legacy Lightning Network engine with static channel management."""
 
-from typing import Dict, List, TypedDict
+from typing import Callable, Dict, List, Sequence, Tuple, TypedDict
+
+import numpy as np
 
 from src.config import LEGACY_CHANNEL_CAPACITY, LEGACY_INITIAL_SPLIT
+from src.engines import _kernels
 from src.engines.abstract_engine import AbstractLSPEngine
-from src.models import Transaction, TransactionType
+from src.models import (
+    TRANSACTION_TYPE_CODES,
+    TRANSACTION_TYPES,
+    Transaction,
+    TransactionBatch,
+    TransactionType,
+)
+
+# Handlers take (sender_id, receiver_id, amount) and return success
+_Handler = Callable[[int, int, int], bool]
 
 
 class ChannelBalance(TypedDict):
@@ -21,11 +33,33 @@ class LegacyEngine(AbstractLSPEngine):
     Each user has a single channel with fixed capacity. Channels are initialized
     with a configurable split between LSP (local) and user (remote) balances.
     Transactions can fail due to insufficient balance on either side.
+
+    Channel state is held as parallel local/remote lists indexed by the
+    user's position in the sorted user IDs, rather than a dict per channel.
     """
 
+    __slots__ = (
+        "_channel_capacity",
+        "_initial_split",
+        "_user_ids",
+        "_user_idx",
+        "_local",
+        "_remote",
+        "_total_local",
+        "_handlers",
+    )
+
+    # Methods the compiled channel kernel reimplements for whole batches
+    _KERNEL_METHODS: Tuple[str, ...] = (
+        "process_raw",
+        "_process_internal",
+        "_process_external_inbound",
+        "_process_external_outbound",
+    )
+
     def __init__(
         self,
-        user_ids: List[int],
+        user_ids: Sequence[int] | np.ndarray,
         channel_capacity: int = LEGACY_CHANNEL_CAPACITY,
         initial_split: float = LEGACY_INITIAL_SPLIT,
     ) -> None:
@@ -33,7 +67,7 @@ class LegacyEngine(AbstractLSPEngine):
         Initialize channels for all users.
 
         Args:
-            user_ids: List of user IDs to create channels for.
+            user_ids: User IDs to create channels for (list or integer array).
             channel_capacity: Total capacity per channel in sats.
             initial_split: Fraction of capacity on LSP side (0.0 to 1.0).
         """
@@ -43,10 +77,26 @@ class LegacyEngine(AbstractLSPEngine):
         local_balance = int(channel_capacity * initial_split)
         remote_balance = channel_capacity - local_balance
 
-        self._channels: Dict[int, ChannelBalance] = {
-            user_id: {"local": local_balance, "remote": remote_balance}
-            for user_id in user_ids
+        # Sorted, de-duplicated IDs; position i holds user _user_ids[i]. Plain
+        # int lists beat NumPy scalar indexing on the per-row path, and are
+        # copied to arrays for the compiled kernel
+        self._user_ids, self._user_idx = _kernels.user_positions(user_ids)
+        self._local: List[int] = [local_balance] * len(self._user_ids)
+        self._remote: List[int] = [remote_balance] * len(self._user_ids)
+
+        # Running sum of local balances, so get_current_tvl is O(1) rather than
+        # a scan of every channel after each transaction
+        self._total_local: int = local_balance * len(self._user_ids)
+
+        # Dispatch table indexed by transaction type code. Subclasses that
+        # override a _process_* method are picked up through self on the
+        # per-row path, and process_batch then skips the compiled kernel
+        handlers: Dict[TransactionType, _Handler] = {
+            TransactionType.INTERNAL: self._process_internal,
+            TransactionType.EXTERNAL_INBOUND: self._process_external_inbound,
+            TransactionType.EXTERNAL_OUTBOUND: self._process_external_outbound,
         }
+        self._handlers: Tuple[_Handler, ...] = tuple(handlers[t] for t in TRANSACTION_TYPES)
 
     def process_transaction(self, tx: Transaction) -> bool:
         """
@@ -58,40 +108,128 @@ class LegacyEngine(AbstractLSPEngine):
         Returns:
             True if successful, False if insufficient balance.
         """
-        if tx.tx_type == TransactionType.EXTERNAL_OUTBOUND:
-            return self._process_external_outbound(tx.sender_id, tx.amount_sats)
-        elif tx.tx_type == TransactionType.EXTERNAL_INBOUND:
-            return self._process_external_inbound(tx.receiver_id, tx.amount_sats)
-        elif tx.tx_type == TransactionType.INTERNAL:
-            return self._process_internal(tx.sender_id, tx.receiver_id, tx.amount_sats)
-        return False
+        return self.process_raw(
+            TRANSACTION_TYPE_CODES[tx.tx_type],
+            tx.sender_id,
+            tx.receiver_id,
+            tx.amount_sats,
+            tx.timestamp,
+        )
+
+    def process_raw(
+        self,
+        tx_type_code: int,
+        sender_id: int,
+        receiver_id: int,
+        amount_sats: int,
+        timestamp: float,
+    ) -> bool:
+        """
+        Process a transaction given as primitive values, without a Transaction.
+
+        Args:
+            tx_type_code: Index into TRANSACTION_TYPES.
+            sender_id: Sending user ID.
+            receiver_id: Receiving user ID.
+            amount_sats: Amount in sats.
+            timestamp: Seconds since simulation start (unused by static channels).
 
-    def _process_external_outbound(self, sender_id: int, amount: int) -> bool:
+        Returns:
+            True if successful, False if insufficient balance.
+        """
+        return self._handlers[tx_type_code](sender_id, receiver_id, amount_sats)
+
+    def process_batch(self, batch: TransactionBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Process a batch with the compiled channel kernel when numba is installed.
+
+        The local/remote lists are copied into arrays, updated by the kernel,
+        and copied back. Without numba, or for a subclass that overrides one
+        of the _KERNEL_METHODS, each row goes through process_raw.
+
+        Args:
+            batch: The transactions to process.
+
+        Returns:
+            Tuple of (success mask, TVL after each transaction).
+        """
+        if _kernels.legacy_run is None or not _kernels.mirrors(
+            type(self), LegacyEngine, self._KERNEL_METHODS
+        ):
+            return self._process_batch_raw(batch)
+        success, tvl, _ = self._run_channel_kernel(batch, _kernels.NO_REFILL)
+        return success, tvl
+
+    def _run_channel_kernel(
+        self, batch: TransactionBatch, refill_target: int
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Run the compiled channel kernel over batch; also returns the refill count."""
+        local = np.array(self._local, dtype=np.int64)
+        remote = np.array(self._remote, dtype=np.int64)
+
+        success, tvl, refill_count = _kernels.legacy_run(
+            batch.tx_type_codes,
+            _kernels.index_of(self._user_ids, batch.sender_ids),
+            _kernels.index_of(self._user_ids, batch.receiver_ids),
+            batch.amount_sats,
+            local,
+            remote,
+            self._total_local,
+            refill_target,
+        )
+
+        self._local = local.tolist()
+        self._remote = remote.tolist()
+        self._total_local = int(local.sum())
+        return success, tvl, int(refill_count)
+
+    def _process_batch_raw(self, batch: TransactionBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """Feed the batch columns to process_raw, reading the running TVL after each."""
+        count = len(batch)
+        success = np.empty(count, dtype=bool)
+        tvl = np.empty(count, dtype=np.float64)
+        process_raw = self.process_raw
+        for i, (code, sender_id, receiver_id, amount, timestamp) in enumerate(
+            zip(
+                batch.tx_type_codes.tolist(),
+                batch.sender_ids.tolist(),
+                batch.receiver_ids.tolist(),
+                batch.amount_sats.tolist(),
+                batch.timestamps.tolist(),
+            )
+        ):
+            success[i] = process_raw(code, sender_id, receiver_id, amount, timestamp)
+            tvl[i] = self._total_local
+        return success, tvl
+
+    def _process_external_outbound(self, sender_id: int, receiver_id: int, amount: int) -> bool:
         """
         Process user sending to external world.
 
         User's remote balance decreases, LSP's local balance increases.
         """
-        channel = self._channels.get(sender_id)
-        if channel is None or channel["remote"] < amount:
+        i = self._user_idx.get(sender_id)
+        if i is None or self._remote[i] < amount:
             return False
 
-        channel["remote"] -= amount
-        channel["local"] += amount
+        self._remote[i] -= amount
+        self._local[i] += amount
+        self._total_local += amount
         return True
 
-    def _process_external_inbound(self, receiver_id: int, amount: int) -> bool:
+    def _process_external_inbound(self, sender_id: int, receiver_id: int, amount: int) -> bool:
         """
         Process external world sending to user.
 
         LSP's local balance decreases, user's remote balance increases.
         """
-        channel = self._channels.get(receiver_id)
-        if channel is None or channel["local"] < amount:
+        i = self._user_idx.get(receiver_id)
+        if i is None or self._local[i] < amount:
             return False
 
-        channel["local"] -= amount
-        channel["remote"] += amount
+        self._local[i] -= amount
+        self._remote[i] += amount
+        self._total_local -= amount
         return True
 
     def _process_internal(self, sender_id: int, receiver_id: int, amount: int) -> bool:
@@ -101,23 +239,26 @@ class LegacyEngine(AbstractLSPEngine):
         Requires sender to have sufficient remote balance AND
         receiver's channel to have sufficient local (LSP) balance.
         """
-        sender_channel = self._channels.get(sender_id)
-        receiver_channel = self._channels.get(receiver_id)
+        s = self._user_idx.get(sender_id)
+        r = self._user_idx.get(receiver_id)
 
-        if sender_channel is None or receiver_channel is None:
+        if s is None or r is None:
             return False
 
-        if sender_channel["remote"] < amount or receiver_channel["local"] < amount:
+        local = self._local
+        remote = self._remote
+        if remote[s] < amount or local[r] < amount:
             return False
 
         # Update sender channel: user pays, LSP receives
-        sender_channel["remote"] -= amount
-        sender_channel["local"] += amount
+        remote[s] -= amount
+        local[s] += amount
 
         # Update receiver channel: LSP pays, user receives
-        receiver_channel["local"] -= amount
-        receiver_channel["remote"] += amount
+        local[r] -= amount
+        remote[r] += amount
 
+        # The LSP gains and loses amount, so _total_local is unchanged
         return True
 
     def get_current_tvl(self) -> float:
@@ -127,7 +268,7 @@ class LegacyEngine(AbstractLSPEngine):
         Returns:
             Sum of all local balances (in sats, as float for interface compat).
         """
-        return float(sum(channel["local"] for channel in self._channels.values()))
+        return float(self._total_local)
 
     def get_name(self) -> str:
         """Returns the engine identifier."""
@@ -141,11 +282,15 @@ class LegacyEngine(AbstractLSPEngine):
             user_id: The user ID to look up.
 
         Returns:
-            ChannelBalance dict or None if user not found.
+            A ChannelBalance snapshot (changing it does not affect the engine),
+            or None if user not found.
         """
-        return self._channels.get(user_id)
+        i = self._user_idx.get(user_id)
+        if i is None:
+            return None
+        return {"local": self._local[i], "remote": self._remote[i]}
 
     def get_total_user_count(self) -> int:
         """Get the number of users with channels."""
-        return len(self._channels)
+        return len(self._user_ids)
 
@@ -1,6 +1,8 @@
 """Legacy Lightning Network engine with JIT/Splicing refill capability."""
 
-from typing import Dict, List
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
 
 from src.config import (
     LEGACY_CHANNEL_CAPACITY,
@@ -9,8 +11,9 @@ from src.config import (
     REBALANCE_LATENCY_SECONDS,
     REFILL_TARGET_PCT,
 )
+from src.engines import _kernels
 from src.engines.legacy_engine import LegacyEngine
-from src.models import Transaction, TransactionType
+from src.models import TransactionBatch
 
 
 SATS_PER_BTC: int = 100_000_000
@@ -25,9 +28,20 @@ class LegacyRefillEngine(LegacyEngine):
     costs including fees and latency incurred from refill operations.
     """
 
+    __slots__ = (
+        "_refill_target_local",
+        "_total_fees_paid",
+        "_total_latency_seconds",
+        "_refill_count",
+        "_total_tx_count",
+    )
+
+    # The kernel's refill branch also stands in for _refill_channel
+    _KERNEL_METHODS: Tuple[str, ...] = LegacyEngine._KERNEL_METHODS + ("_refill_channel",)
+
     def __init__(
         self,
-        user_ids: List[int],
+        user_ids: Sequence[int] | np.ndarray,
         channel_capacity: int = LEGACY_CHANNEL_CAPACITY,
         initial_split: float = LEGACY_INITIAL_SPLIT,
     ) -> None:
@@ -35,83 +49,117 @@ class LegacyRefillEngine(LegacyEngine):
         Initialize channels for all users with refill tracking.
 
         Args:
-            user_ids: List of user IDs to create channels for.
+            user_ids: User IDs to create channels for (list or integer array).
             channel_capacity: Total capacity per channel in sats.
             initial_split: Fraction of capacity on LSP side (0.0 to 1.0).
         """
         super().__init__(user_ids, channel_capacity, initial_split)
 
+        # Local balance a refill tops up to (REFILL_TARGET_PCT of capacity),
+        # computed once rather than per refill check
+        self._refill_target_local: int = int(channel_capacity * REFILL_TARGET_PCT)
+
         # Operational metrics tracking
         self._total_fees_paid: int = 0  # sats
         self._total_latency_seconds: int = 0
         self._refill_count: int = 0
         self._total_tx_count: int = 0
 
-    def process_transaction(self, tx: Transaction) -> bool:
+    def process_raw(
+        self,
+        tx_type_code: int,
+        sender_id: int,
+        receiver_id: int,
+        amount_sats: int,
+        timestamp: float,
+    ) -> bool:
         """
-        Process a transaction, refilling LSP liquidity if needed.
+        Count the transaction, then process it through the parent dispatch.
 
-        For inbound transactions or the receiver leg of internal transactions,
-        if LSP liquidity is insufficient, performs a JIT refill before processing.
+        The refill itself happens in the overridden inbound and internal
+        handlers. process_transaction and process_batch both route through here.
 
         Args:
-            tx: The Transaction to process.
+            tx_type_code: Index into TRANSACTION_TYPES.
+            sender_id: Sending user ID.
+            receiver_id: Receiving user ID.
+            amount_sats: Amount in sats.
+            timestamp: Seconds since simulation start.
 
         Returns:
             True if successful, False if insufficient user balance.
         """
         self._total_tx_count += 1
+        return super().process_raw(tx_type_code, sender_id, receiver_id, amount_sats, timestamp)
+
+    def process_batch(self, batch: TransactionBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Process a batch with the compiled channel kernel, refills included.
 
-        # Step 1: Analyze liquidity and potentially refill
-        if tx.tx_type == TransactionType.EXTERNAL_INBOUND:
-            self._maybe_refill_for_receiver(tx.receiver_id, tx.amount_sats)
-        elif tx.tx_type == TransactionType.INTERNAL:
-            # Check sender has funds first - don't refill if sender can't pay
-            sender_channel = self._channels.get(tx.sender_id)
-            if sender_channel is not None and sender_channel["remote"] >= tx.amount_sats:
-                # Sender can pay, so check if we need to refill receiver's channel
-                self._maybe_refill_for_receiver(tx.receiver_id, tx.amount_sats)
+        Without numba, or for a subclass that overrides one of the
+        _KERNEL_METHODS, each row goes through process_raw.
 
-        # Step 2: Execute the transaction via parent implementation
-        return super().process_transaction(tx)
+        Args:
+            batch: The transactions to process.
 
-    def _maybe_refill_for_receiver(self, receiver_id: int, amount: int) -> None:
+        Returns:
+            Tuple of (success mask, TVL after each transaction).
+        """
+        if _kernels.legacy_run is None or not _kernels.mirrors(
+            type(self), LegacyRefillEngine, self._KERNEL_METHODS
+        ):
+            return self._process_batch_raw(batch)
+
+        success, tvl, refill_count = self._run_channel_kernel(batch, self._refill_target_local)
+
+        self._total_tx_count += len(batch)
+        self._refill_count += refill_count
+        self._total_fees_paid += refill_count * REBALANCE_COST_SATS
+        self._total_latency_seconds += refill_count * REBALANCE_LATENCY_SECONDS
+        return success, tvl
+
+    def _process_external_inbound(self, sender_id: int, receiver_id: int, amount: int) -> bool:
+        """Refill the receiver's channel if LSP liquidity is short, then pay the user."""
+        i = self._user_idx.get(receiver_id)
+        # Common case: enough local balance, so a single compare and no call
+        if i is not None and self._local[i] < amount:
+            self._refill_channel(i, amount)
+        return super()._process_external_inbound(sender_id, receiver_id, amount)
+
+    def _process_internal(self, sender_id: int, receiver_id: int, amount: int) -> bool:
+        """Refill the receiver's channel if needed, then transfer via the LSP."""
+        # Check sender has funds first - don't refill if sender can't pay
+        s = self._user_idx.get(sender_id)
+        if s is not None and self._remote[s] >= amount:
+            # Sender can pay, so check if we need to refill receiver's channel
+            r = self._user_idx.get(receiver_id)
+            if r is not None and self._local[r] < amount:
+                self._refill_channel(r, amount)
+        return super()._process_internal(sender_id, receiver_id, amount)
+
+    def _refill_channel(self, i: int, amount: int) -> None:
         """
-        Refill receiver's channel if LSP lacks liquidity.
+        Refill a channel whose LSP balance cannot cover amount.
 
-        Calculates the amount needed to reach REFILL_TARGET_PCT of capacity,
-        ensuring it covers the current transaction amount. Models JIT channel
-        open or splice-in by increasing LSP's local balance.
+        Tops the local balance up to REFILL_TARGET_PCT of capacity, or to
+        amount if that is larger. Models JIT channel open or splice-in by
+        increasing LSP's local balance. Callers check the shortfall first.
 
         Args:
-            receiver_id: The user ID receiving funds.
+            i: Position of the receiving user's channel.
             amount: The transaction amount in sats.
         """
-        channel = self._channels.get(receiver_id)
-        if channel is None:
-            return
-
-        current_local = channel["local"]
-
-        # Check if LSP has enough liquidity for this transaction
-        if current_local >= amount:
-            return  # No refill needed
-
-        # Calculate target local balance (50% of capacity by default)
-        target_local = int(self._channel_capacity * REFILL_TARGET_PCT)
-
-        # Ensure we have enough for this transaction
-        target_local = max(target_local, amount)
-
-        # Calculate amount to add
-        amount_to_add = target_local - current_local
-
-        if amount_to_add <= 0:
-            return
+        # Target local balance (50% of capacity by default), but enough for
+        # this transaction; always above the current balance, which is < amount
+        target_local = self._refill_target_local
+        if target_local < amount:
+            target_local = amount
+        amount_to_add = target_local - self._local[i]
 
         # Perform the refill: increase local balance
         # Models JIT channel open or splice-in where LSP injects external funds
-        channel["local"] += amount_to_add
+        self._local[i] = target_local
+        self._total_local += amount_to_add
 
         # Track operational costs
         self._total_fees_paid += REBALANCE_COST_SATS
@@ -1,7 +1,11 @@
 """Passthrough engine implementation for testing."""
 
+from typing import Tuple
+
+import numpy as np
+
 from src.engines.abstract_engine import AbstractLSPEngine
-from src.models import Transaction
+from src.models import Transaction, TransactionBatch
 
 
 class PassthroughEngine(AbstractLSPEngine):
@@ -12,10 +16,17 @@ class PassthroughEngine(AbstractLSPEngine):
     works correctly before implementing real LSP logic.
     """
 
+    __slots__ = ()
+
     def process_transaction(self, tx: Transaction) -> bool:
         """Always returns True - all transactions succeed."""
         return True
 
+    def process_batch(self, batch: TransactionBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """Every transaction succeeds and TVL never moves, so no per-row work."""
+        count = len(batch)
+        return np.ones(count, dtype=bool), np.full(count, self.get_current_tvl())
+
     def get_current_tvl(self) -> float:
         """Always returns 0.0 - no liquidity tracking."""
         return 0.0
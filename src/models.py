@@ -1,6 +1,8 @@
+from dataclasses import dataclass
 from enum import Enum
+from typing import Dict, Iterator, NamedTuple, Sequence, Tuple
 
-from pydantic import BaseModel, ConfigDict
+import numpy as np
 
 
 class UserType(str, Enum):
@@ -11,6 +13,14 @@ class UserType(str, Enum):
     HODLER = "HODLER"
 
 
+# Ordinal codes so user types can index arrays and feed np.bincount
+USER_TYPES: Tuple[UserType, ...] = tuple(UserType)
+USER_TYPE_VALUES: Tuple[str, ...] = tuple(user_type.value for user_type in USER_TYPES)
+USER_TYPE_CODES: Dict[UserType, int] = {
+    user_type: code for code, user_type in enumerate(USER_TYPES)
+}
+
+
 class TransactionType(str, Enum):
     """Classification of transaction flow direction."""
 
@@ -19,19 +29,72 @@ class TransactionType(str, Enum):
     EXTERNAL_OUTBOUND = "EXTERNAL_OUTBOUND"
 
 
-class User(BaseModel):
-    """Represents a single actor in the simulation."""
+# Ordinal codes used by the columnar traffic representation
+TRANSACTION_TYPES: Tuple[TransactionType, ...] = tuple(TransactionType)
+TRANSACTION_TYPE_VALUES: Tuple[str, ...] = tuple(tx_type.value for tx_type in TRANSACTION_TYPES)
+TRANSACTION_TYPE_CODES: Dict[TransactionType, int] = {
+    tx_type: code for code, tx_type in enumerate(TRANSACTION_TYPES)
+}
+
 
-    model_config = ConfigDict(frozen=True)
+class User(NamedTuple):
+    """
+    Represents a single actor in the simulation.
+
+    A NamedTuple for the same reason as Transaction: populations are built
+    in bulk, and tuple construction skips the frozen dataclass's per-field
+    object.__setattr__.
+    """
 
     user_id: int
     user_type: UserType
 
 
-class Transaction(BaseModel):
-    """Represents a single transaction in the simulation."""
+@dataclass(frozen=True)
+class UserPopulation:
+    """
+    Column-oriented (struct-of-arrays) view of a user population.
+
+    Holds user IDs and their type codes (indices into USER_TYPES) as arrays,
+    so code that samples participants can reuse one scan of the User list
+    across calls, e.g. when generating several months of traffic.
+    """
+
+    user_ids: np.ndarray  # int64
+    user_type_codes: np.ndarray  # intp, index into USER_TYPES
+
+    def __len__(self) -> int:
+        """Number of users."""
+        return len(self.user_ids)
+
+    @classmethod
+    def from_users(cls, users: Sequence[User]) -> "UserPopulation":
+        """Build the columns from User objects in a single pass per column."""
+        count = len(users)
+        return cls(
+            user_ids=np.fromiter((user.user_id for user in users), dtype=np.int64, count=count),
+            user_type_codes=np.fromiter(
+                (USER_TYPE_CODES[user.user_type] for user in users), dtype=np.intp, count=count
+            ),
+        )
+
+    @classmethod
+    def coerce(cls, users: "UserPopulation | Sequence[User]") -> "UserPopulation":
+        """Return users as a UserPopulation, scanning a User sequence only if needed."""
+        if isinstance(users, cls):
+            return users
+        return cls.from_users(users)
 
-    model_config = ConfigDict(frozen=True)
+
+class Transaction(NamedTuple):
+    """
+    Represents a single transaction in the simulation.
+
+    A NamedTuple rather than a validated model or frozen dataclass:
+    transactions are created in bulk, and a tuple is built in one C-level
+    allocation with no per-field __setattr__. External input is checked once
+    at the CSV boundary (see load_traffic).
+    """
 
     tx_id: str
     timestamp: float
@@ -39,3 +102,178 @@ class Transaction(BaseModel):
     receiver_id: int
     amount_sats: int
     tx_type: TransactionType
+
+
+@dataclass(frozen=True)
+class TransactionBatch:
+    """
+    Column-oriented (struct-of-arrays) view of a sequence of transactions.
+
+    Each attribute is a NumPy array with one entry per transaction, in
+    timestamp order. Transaction types are stored as ordinal codes into
+    TRANSACTION_TYPES so the batch holds no per-row Python objects other
+    than the transaction IDs.
+    """
+
+    tx_ids: np.ndarray  # object (str)
+    timestamps: np.ndarray  # float64, seconds
+    sender_ids: np.ndarray  # int64
+    receiver_ids: np.ndarray  # int64
+    amount_sats: np.ndarray  # int64
+    tx_type_codes: np.ndarray  # int8, index into TRANSACTION_TYPES
+
+    def __len__(self) -> int:
+        """Number of transactions in the batch."""
+        return len(self.timestamps)
+
+    def __getitem__(self, index: slice) -> "TransactionBatch":
+        """Contiguous sub-batch; the columns are views, not copies."""
+        if not isinstance(index, slice):
+            raise TypeError("TransactionBatch only supports slice indexing")
+        return TransactionBatch(
+            tx_ids=self.tx_ids[index],
+            timestamps=self.timestamps[index],
+            sender_ids=self.sender_ids[index],
+            receiver_ids=self.receiver_ids[index],
+            amount_sats=self.amount_sats[index],
+            tx_type_codes=self.tx_type_codes[index],
+        )
+
+    @classmethod
+    def from_transactions(cls, transactions: Sequence[Transaction]) -> "TransactionBatch":
+        """Build a batch from Transaction objects in a single pass per column."""
+        count = len(transactions)
+        return cls(
+            tx_ids=np.array([tx.tx_id for tx in transactions], dtype=object),
+            timestamps=np.fromiter(
+                (tx.timestamp for tx in transactions), dtype=np.float64, count=count
+            ),
+            sender_ids=np.fromiter(
+                (tx.sender_id for tx in transactions), dtype=np.int64, count=count
+            ),
+            receiver_ids=np.fromiter(
+                (tx.receiver_id for tx in transactions), dtype=np.int64, count=count
+            ),
+            amount_sats=np.fromiter(
+                (tx.amount_sats for tx in transactions), dtype=np.int64, count=count
+            ),
+            tx_type_codes=np.fromiter(
+                (TRANSACTION_TYPE_CODES[tx.tx_type] for tx in transactions),
+                dtype=np.int8,
+                count=count,
+            ),
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["TransactionBatch"]) -> "TransactionBatch":
+        """Join batches end to end with one np.concatenate per column."""
+        if not batches:
+            return cls.from_transactions([])
+        return cls(
+            tx_ids=np.concatenate([batch.tx_ids for batch in batches]),
+            timestamps=np.concatenate([batch.timestamps for batch in batches]),
+            sender_ids=np.concatenate([batch.sender_ids for batch in batches]),
+            receiver_ids=np.concatenate([batch.receiver_ids for batch in batches]),
+            amount_sats=np.concatenate([batch.amount_sats for batch in batches]),
+            tx_type_codes=np.concatenate([batch.tx_type_codes for batch in batches]),
+        )
+
+    def iter_transactions(self) -> Iterator[Transaction]:
+        """Yield the batch back as Transaction objects, in order."""
+        return map(
+            Transaction._make,
+            zip(
+                self.tx_ids.tolist(),
+                self.timestamps.tolist(),
+                self.sender_ids.tolist(),
+                self.receiver_ids.tolist(),
+                self.amount_sats.tolist(),
+                map(TRANSACTION_TYPES.__getitem__, self.tx_type_codes.tolist()),
+            ),
+        )
+
+
+class TVLHistory:
+    """
+    Growable struct-of-arrays record of (timestamp, tvl_sats) samples.
+
+    Timestamps and TVL live in two contiguous float64 buffers (16 bytes per
+    sample, no per-sample tuples), so metrics and plots can use the columns
+    directly. Iterating still yields (timestamp, tvl) pairs.
+    """
+
+    __slots__ = ("_timestamps", "_tvl", "_size")
+
+    def __init__(self, capacity: int = 0) -> None:
+        """
+        Create an empty history.
+
+        Args:
+            capacity: Number of samples to preallocate room for.
+        """
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._tvl = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+
+    @classmethod
+    def from_arrays(cls, timestamps: np.ndarray, tvl: np.ndarray) -> "TVLHistory":
+        """Wrap two equal-length float64 columns, without copying when possible."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        tvl = np.asarray(tvl, dtype=np.float64)
+        if timestamps.shape != tvl.shape or timestamps.ndim != 1:
+            raise ValueError("timestamps and tvl must be 1-D arrays of equal length")
+        history = cls()
+        history._timestamps = timestamps
+        history._tvl = tvl
+        history._size = len(timestamps)
+        return history
+
+    @classmethod
+    def coerce(
+        cls, history: "TVLHistory | Sequence[Tuple[float, float]] | np.ndarray"
+    ) -> "TVLHistory":
+        """Return history as a TVLHistory, accepting (timestamp, tvl) pairs or an (N, 2) array."""
+        if isinstance(history, cls):
+            return history
+        pairs = np.asarray(history, dtype=np.float64).reshape(-1, 2)
+        return cls.from_arrays(pairs[:, 0], pairs[:, 1])
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Sample timestamps in seconds, as a view."""
+        return self._timestamps[:self._size]
+
+    @property
+    def tvl(self) -> np.ndarray:
+        """TVL in sats at each timestamp, as a view."""
+        return self._tvl[:self._size]
+
+    def __len__(self) -> int:
+        """Number of samples recorded."""
+        return self._size
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        """Yield (timestamp, tvl) pairs in order."""
+        return zip(self.timestamps.tolist(), self.tvl.tolist())
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """(N, 2) array of (timestamp, tvl) rows, for np.asarray callers."""
+        pairs = np.column_stack((self.timestamps, self.tvl))
+        return pairs if dtype is None else pairs.astype(dtype, copy=False)
+
+    def append(self, timestamp: float, tvl: float) -> None:
+        """Record one sample, doubling the buffers when they are full."""
+        if self._size == len(self._timestamps):
+            self._grow(max(2 * self._size, 64))
+        self._timestamps[self._size] = timestamp
+        self._tvl[self._size] = tvl
+        self._size += 1
+
+    def _grow(self, capacity: int) -> None:
+        """Reallocate both buffers to capacity, keeping the recorded samples."""
+        timestamps = np.empty(capacity, dtype=np.float64)
+        tvl = np.empty(capacity, dtype=np.float64)
+        timestamps[:self._size] = self.timestamps
+        tvl[:self._size] = self.tvl
+        self._timestamps = timestamps
+        self._tvl = tvl
@@ -1,6 +1,13 @@
 """Simulation harness for L2 Capital Velocity."""
 
-from src.simulation.runner import SimulationResult, SimulationRunner
+from src.simulation.parallel import EngineFactory, run_engines
+from src.simulation.runner import SimulationResult, SimulationRunner, load_traffic
 
-__all__ = ["SimulationResult", "SimulationRunner"]
+__all__ = [
+    "EngineFactory",
+    "SimulationResult",
+    "SimulationRunner",
+    "load_traffic",
+    "run_engines",
+]
 
@@ -0,0 +1,158 @@
+"""Run several engine simulations over the same traffic in worker processes."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import fields
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from src.engines.abstract_engine import AbstractLSPEngine
+from src.models import Transaction, TransactionBatch
+from src.simulation.runner import (
+    SimulationResult,
+    SimulationRunner,
+    as_transaction_batch,
+    load_traffic,
+)
+
+
+# Zero-argument callable returning a fresh engine. Must be picklable
+# (a class or a functools.partial over one) to cross the process boundary.
+EngineFactory = Callable[[], AbstractLSPEngine]
+
+# (batch field, byte offset into the shared block, shape, dtype string) per column
+_ColumnSpec = Tuple[str, int, Tuple[int, ...], str]
+
+# Column offsets are rounded up to this many bytes (one cache line)
+_COLUMN_ALIGNMENT: int = 64
+
+# Worker-side view of the parent's traffic, set up by _attach_shared_batch
+_shared_traffic: TransactionBatch | None = None
+_shared_block: SharedMemory | None = None
+
+
+def _run_engine(
+    name: str,
+    engine_factory: EngineFactory,
+    traffic: TransactionBatch,
+) -> Tuple[str, SimulationResult]:
+    """
+    Build the engine inside the worker and run the simulation.
+
+    btc_days is computed here too, so the integration runs in parallel and the
+    cached value travels back with the pickled result.
+    """
+    engine = engine_factory()
+    result = SimulationRunner(traffic, engine).run()
+    result.btc_days  # warm the cached_property
+    return name, result
+
+
+def _share_batch(
+    batch: TransactionBatch, stack: ExitStack
+) -> Tuple[str, List[_ColumnSpec]]:
+    """
+    Copy the batch columns into one shared memory block, back to back.
+
+    The block is closed and unlinked when stack exits. tx_ids are stored
+    as fixed-width strings, since object arrays cannot live in a flat buffer.
+
+    Returns:
+        Tuple of (block name, per-column layout specs).
+    """
+    columns: List[Tuple[str, np.ndarray]] = []
+    specs: List[_ColumnSpec] = []
+    size = 0
+    for batch_field in fields(TransactionBatch):
+        column = getattr(batch, batch_field.name)
+        if column.dtype == object:
+            column = column.astype(str)
+        offset = -(-size // _COLUMN_ALIGNMENT) * _COLUMN_ALIGNMENT
+        size = offset + column.nbytes
+        columns.append((batch_field.name, column))
+        specs.append((batch_field.name, offset, column.shape, column.dtype.str))
+
+    block = SharedMemory(create=True, size=max(size, 1))
+    stack.callback(block.unlink)
+    stack.callback(block.close)
+    for (_, column), (_, offset, shape, _) in zip(columns, specs):
+        np.ndarray(shape, dtype=column.dtype, buffer=block.buf, offset=offset)[:] = column
+    return block.name, specs
+
+
+def _attach_shared_batch(block_name: str, specs: List[_ColumnSpec]) -> None:
+    """Worker initializer: wrap the parent's shared block as a zero-copy batch."""
+    global _shared_traffic, _shared_block
+    _shared_block = SharedMemory(name=block_name)  # kept mapped for the worker's lifetime
+    columns: Dict[str, np.ndarray] = {
+        field_name: np.ndarray(
+            shape, dtype=np.dtype(dtype), buffer=_shared_block.buf, offset=offset
+        )
+        for field_name, offset, shape, dtype in specs
+    }
+    _shared_traffic = TransactionBatch(**columns)
+
+
+def _run_shared_engine(
+    name: str, engine_factory: EngineFactory
+) -> Tuple[str, SimulationResult]:
+    """Run one simulation in a worker over the shared traffic batch."""
+    return _run_engine(name, engine_factory, _shared_traffic)
+
+
+def run_engines(
+    engine_factories: Mapping[str, EngineFactory],
+    traffic: str | Path | TransactionBatch | Sequence[Transaction],
+    max_workers: int | None = None,
+) -> Dict[str, SimulationResult]:
+    """
+    Run one simulation per engine, in parallel where cores are available.
+
+    Each simulation is independent and CPU-bound, so they are dispatched to
+    a ProcessPoolExecutor to sidestep the GIL. The traffic is loaded (or
+    packed into a TransactionBatch) once up front; for the pool its columns
+    are laid out in a single shared memory block, so workers neither re-parse
+    the file nor receive a pickled copy each. With a single worker the runs happen
+    in-process to avoid the pool's start-up overhead.
+
+    Args:
+        engine_factories: Mapping of result key to engine factory.
+        traffic: Traffic CSV path, preloaded TransactionBatch or Transaction
+            list shared by all runs.
+        max_workers: Worker process count (default: one per engine, capped at CPU count).
+
+    Returns:
+        Dictionary of SimulationResult keyed like engine_factories, in the same order.
+    """
+    if max_workers is None:
+        max_workers = min(len(engine_factories), os.cpu_count() or 1)
+
+    if isinstance(traffic, (str, Path)):
+        traffic = load_traffic(traffic)
+    else:
+        traffic = as_transaction_batch(traffic)
+
+    if max_workers <= 1:
+        return {
+            name: _run_engine(name, factory, traffic)[1]
+            for name, factory in engine_factories.items()
+        }
+
+    with ExitStack() as stack:
+        block_name, specs = _share_batch(traffic, stack)
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_attach_shared_batch,
+            initargs=(block_name, specs),
+        ) as executor:
+            futures = [
+                executor.submit(_run_shared_engine, name, factory)
+                for name, factory in engine_factories.items()
+            ]
+            completed = dict(future.result() for future in futures)
+
+    return {name: completed[name] for name in engine_factories}
@@ -1,13 +1,105 @@
 """Simulation runner that processes traffic through an LSP engine."""
 
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, Sequence
 
-import pandas as pd
+import numpy as np
 
+from src.analysis.metrics import calculate_btc_days
 from src.engines.abstract_engine import AbstractLSPEngine
-from src.models import Transaction, TransactionType
+from src.models import (
+    TRANSACTION_TYPE_VALUES,
+    Transaction,
+    TransactionBatch,
+    TVLHistory,
+)
+
+
+# Transactions handed to AbstractLSPEngine.process_batch per call
+PROCESS_BATCH_SIZE: int = 16_384
+
+# Explicit column dtypes so read_csv skips type inference; tx_type is parsed
+# straight to a categorical so no per-row str objects are kept for it
+TRAFFIC_COLUMN_DTYPES = {
+    "tx_id": object,
+    "timestamp": np.float64,
+    "sender_id": np.int64,
+    "receiver_id": np.int64,
+    "amount_sats": np.int64,
+    "tx_type": "category",
+}
+
+
+def load_traffic(traffic_file_path: str | Path) -> TransactionBatch:
+    """
+    Parse a traffic file into a columnar TransactionBatch.
+
+    Load once and hand the batch to several SimulationRunners to avoid
+    re-reading the same file for every engine. Files ending in ``.parquet``
+    are read as Parquet (requires pyarrow); anything else is read as CSV,
+    with pyarrow's multithreaded parser when it is installed. Either CSV path
+    parses floats exactly, so the batch does not depend on which one ran.
+    The stdlib csv module is not used: it boxes every field as a Python str
+    before conversion and measured about 3.5x slower than read_csv on a
+    100k-row traffic file.
+
+    Args:
+        traffic_file_path: Path to the traffic CSV or Parquet file.
+
+    Returns:
+        TransactionBatch with one array per CSV column.
+
+    Raises:
+        ValueError: If a column does not parse as its expected type or a
+            tx_type value is unknown. This is the validation boundary for
+            traffic coming from disk.
+    """
+    import pandas as pd  # deferred: only needed when parsing from disk
+
+    if Path(traffic_file_path).suffix.lower() == ".parquet":
+        df = pd.read_parquet(traffic_file_path, columns=list(TRAFFIC_COLUMN_DTYPES))
+        df = df.astype(TRAFFIC_COLUMN_DTYPES)
+    else:
+        df = pd.read_csv(traffic_file_path, dtype=TRAFFIC_COLUMN_DTYPES, **_csv_read_options())
+    # Re-map the parsed categories onto TRANSACTION_TYPES order; unknown
+    # values become missing, with code -1
+    tx_type_codes = df["tx_type"].cat.set_categories(TRANSACTION_TYPE_VALUES).cat.codes
+    if (tx_type_codes < 0).any():
+        raise ValueError(f"Unknown tx_type value in {traffic_file_path}")
+
+    return TransactionBatch(
+        tx_ids=df["tx_id"].to_numpy(dtype=object),
+        timestamps=df["timestamp"].to_numpy(),
+        sender_ids=df["sender_id"].to_numpy(),
+        receiver_ids=df["receiver_id"].to_numpy(),
+        amount_sats=df["amount_sats"].to_numpy(),
+        tx_type_codes=tx_type_codes.to_numpy(dtype=np.int8),
+    )
+
+
+def _csv_read_options() -> Dict[str, str]:
+    """
+    read_csv engine options: pyarrow's parser when installed, else the C parser.
+
+    The C parser's default float conversion can be one ULP off; round_trip
+    makes it exact, matching pyarrow.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return {"engine": "c", "float_precision": "round_trip"}
+    return {"engine": "pyarrow"}
+
+
+def as_transaction_batch(
+    traffic: TransactionBatch | Sequence[Transaction],
+) -> TransactionBatch:
+    """Return in-memory traffic as a TransactionBatch, packing Transaction objects once."""
+    if isinstance(traffic, TransactionBatch):
+        return traffic
+    return TransactionBatch.from_transactions(traffic)
 
 
 @dataclass
@@ -19,9 +111,15 @@ class SimulationResult:
     total_volume_failed: int  # in sats
     tx_success_count: int
     tx_failure_count: int
-    tvl_history: List[Tuple[float, float]] = field(default_factory=list)
+    # (timestamp, tvl_sats) sample after each transaction, or a subset chosen
+    # by tvl_sample_stride / tvl_sample_interval (see SimulationRunner)
+    tvl_history: TVLHistory = field(default_factory=TVLHistory)
     operational_stats: dict = field(default_factory=dict)
 
+    def __post_init__(self) -> None:
+        """Store tvl_history as timestamp/TVL columns, whatever form it was passed in."""
+        self.tvl_history = TVLHistory.coerce(self.tvl_history)
+
     @property
     def total_transactions(self) -> int:
         """Total number of transactions processed."""
@@ -39,58 +137,107 @@ class SimulationResult:
         """Percentage of failed transactions (0.0 to 1.0)."""
         return 1.0 - self.success_rate
 
+    @cached_property
+    def btc_days(self) -> float:
+        """BTC-Days of tvl_history, integrated on first access and then cached."""
+        return calculate_btc_days(self.tvl_history)
+
 
 class SimulationRunner:
     """
     Runs transaction traffic through an LSP engine and collects statistics.
 
-    Loads transactions from a CSV file and processes each through the
-    provided engine, tracking success/failure rates and TVL over time.
+    Loads transactions from a CSV file (or takes an already-loaded
+    TransactionBatch or in-memory Transaction list) and processes each
+    through the provided engine, tracking success/failure rates and TVL
+    over time.
     """
 
-    def __init__(self, traffic_file_path: str | Path, engine: AbstractLSPEngine) -> None:
+    def __init__(
+        self,
+        traffic: str | Path | TransactionBatch | Sequence[Transaction],
+        engine: AbstractLSPEngine,
+        tvl_sample_stride: int = 1,
+        tvl_sample_interval: float | None = None,
+    ) -> None:
         """
         Initialize the simulation runner.
 
         Args:
-            traffic_file_path: Path to the traffic CSV file.
+            traffic: Path to the traffic CSV/Parquet file, a TransactionBatch
+                from load_traffic() to share one parse across several runners,
+                or freshly generated Transaction objects (no file round-trip).
             engine: The LSP engine to process transactions through.
+            tvl_sample_stride: Record TVL after every stride-th transaction
+                (plus the last one) instead of after each. Values above 1 shrink
+                tvl_history for plotting, but btc_days then integrates the
+                coarser samples and is only approximate.
+            tvl_sample_interval: Alternatively, record TVL after the first
+                transaction at or past every interval seconds from the start
+                (plus the last one). Same btc_days caveat as the stride.
+                Requires traffic sorted by timestamp; run() raises otherwise.
+
+        Raises:
+            ValueError: If tvl_sample_stride is less than 1, tvl_sample_interval
+                is not positive, or both are given.
         """
-        self.traffic_file_path = Path(traffic_file_path)
+        if tvl_sample_stride < 1:
+            raise ValueError(f"tvl_sample_stride must be >= 1, got {tvl_sample_stride}")
+        if tvl_sample_interval is not None:
+            if tvl_sample_interval <= 0:
+                raise ValueError(f"tvl_sample_interval must be > 0, got {tvl_sample_interval}")
+            if tvl_sample_stride != 1:
+                raise ValueError("Pass tvl_sample_stride or tvl_sample_interval, not both")
+        if isinstance(traffic, (str, Path)):
+            self.traffic_file_path: Path | None = Path(traffic)
+            self._traffic: TransactionBatch | None = None
+        else:
+            self.traffic_file_path = None
+            self._traffic = as_transaction_batch(traffic)
         self.engine = engine
+        self.tvl_sample_stride = tvl_sample_stride
+        self.tvl_sample_interval = tvl_sample_interval
 
     def run(self) -> SimulationResult:
         """
         Execute the simulation and return results.
 
-        Loads the traffic CSV, processes each transaction through the engine,
-        and collects statistics on success/failure rates and TVL history.
+        Loads the traffic file (unless a batch was supplied), feeds it to the
+        engine in fixed-size blocks via process_batch, and collects statistics
+        on success/failure rates and TVL history. load_traffic hands back only
+        the column arrays, so the parsed DataFrame is already released before
+        the first block is processed.
 
         Returns:
             SimulationResult containing all collected statistics.
+
+        Raises:
+            ValueError: If tvl_sample_interval is set and the traffic is not
+                sorted by timestamp.
         """
-        df = pd.read_csv(self.traffic_file_path)
+        traffic = self._traffic
+        if traffic is None:
+            traffic = load_traffic(self.traffic_file_path)
 
-        total_volume_processed = 0
-        total_volume_failed = 0
-        tx_success_count = 0
-        tx_failure_count = 0
-        tvl_history: List[Tuple[float, float]] = []
+        count = len(traffic)
+        success = np.empty(count, dtype=bool)
 
-        for _, row in df.iterrows():
-            tx = self._row_to_transaction(row)
-            success = self.engine.process_transaction(tx)
+        sampled = self._sample_rows(traffic.timestamps)
+        # Preallocated: sample rows are known up front, TVL is filled per block
+        tvl = np.empty(len(sampled), dtype=np.float64)
 
-            if success:
-                total_volume_processed += tx.amount_sats
-                tx_success_count += 1
-            else:
-                total_volume_failed += tx.amount_sats
-                tx_failure_count += 1
+        for start in range(0, count, PROCESS_BATCH_SIZE):
+            stop = min(start + PROCESS_BATCH_SIZE, count)
+            success[start:stop], block_tvl = self.engine.process_batch(traffic[start:stop])
+            lo, hi = np.searchsorted(sampled, (start, stop))
+            tvl[lo:hi] = block_tvl[sampled[lo:hi] - start]
 
-            # Record TVL at each timestamp
-            current_tvl = self.engine.get_current_tvl()
-            tvl_history.append((tx.timestamp, current_tvl))
+        # Volume and count totals as reductions over the success mask
+        amounts = traffic.amount_sats
+        tx_success_count = int(np.count_nonzero(success))
+        tx_failure_count = count - tx_success_count
+        total_volume_processed = int(amounts[success].sum())
+        total_volume_failed = int(amounts.sum()) - total_volume_processed
 
         # Collect operational stats from the engine
         operational_stats = self.engine.get_operational_stats()
@@ -101,19 +248,27 @@ class SimulationRunner:
             total_volume_failed=total_volume_failed,
             tx_success_count=tx_success_count,
             tx_failure_count=tx_failure_count,
-            tvl_history=tvl_history,
+            tvl_history=TVLHistory.from_arrays(traffic.timestamps[sampled], tvl),
             operational_stats=operational_stats,
         )
 
-    @staticmethod
-    def _row_to_transaction(row: pd.Series) -> Transaction:
-        """Convert a DataFrame row back to a Transaction object."""
-        return Transaction(
-            tx_id=row["tx_id"],
-            timestamp=float(row["timestamp"]),
-            sender_id=int(row["sender_id"]),
-            receiver_id=int(row["receiver_id"]),
-            amount_sats=int(row["amount_sats"]),
-            tx_type=TransactionType(row["tx_type"]),
-        )
+    def _sample_rows(self, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Row indices whose TVL is kept, in ascending order.
 
+        The first and last rows are always included so the history spans the
+        whole run.
+        """
+        count = len(timestamps)
+        if self.tvl_sample_interval is not None and count:
+            if not (timestamps[1:] >= timestamps[:-1]).all():
+                raise ValueError("tvl_sample_interval requires traffic sorted by timestamp")
+            grid = np.arange(timestamps[0], timestamps[-1], self.tvl_sample_interval)
+            # First row at or past each grid time; quiet stretches yield repeats.
+            # Row 0 is prepended as the grid is empty when all timestamps match
+            sampled = np.unique(np.append(0, np.searchsorted(timestamps, grid)))
+        else:
+            sampled = np.arange(0, count, self.tvl_sample_stride)
+        if count and (sampled.size == 0 or sampled[-1] != count - 1):
+            sampled = np.append(sampled, count - 1)
+        return sampled
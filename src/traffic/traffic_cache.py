@@ -0,0 +1,102 @@
+"""On-disk memoization of generated traffic, keyed by simulation config."""
+
+import hashlib
+import json
+from dataclasses import asdict
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from src import models
+from src.config import SimulationConfig
+from src.models import TransactionBatch, User, UserPopulation
+from src.traffic import traffic_generator
+from src.traffic.traffic_generator import TrafficGenerator
+
+# Default cache location, relative to the working directory (git-ignored)
+TRAFFIC_CACHE_DIR: Path = Path(".cache") / "traffic"
+
+
+def _generator_fingerprint() -> str:
+    """
+    Hash of the source of the modules that decide what traffic is generated.
+
+    Any edit to the generator or the batch model therefore changes the cache
+    key, so a stale cache file is never reused after a code change.
+    """
+    digest = hashlib.sha1()
+    for module in (traffic_generator, models):
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+_GENERATOR_FINGERPRINT: str = _generator_fingerprint()
+
+
+def traffic_cache_key(config: SimulationConfig) -> str:
+    """
+    Stable short hash of every config field plus the generator fingerprint.
+
+    Args:
+        config: The configuration the traffic is generated from.
+
+    Returns:
+        16-character hex digest.
+    """
+    payload = json.dumps(
+        {"generator": _GENERATOR_FINGERPRINT, "config": asdict(config)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def load_or_generate_traffic(
+    config: SimulationConfig,
+    users: List[User] | UserPopulation,
+    cache_dir: Path = TRAFFIC_CACHE_DIR,
+) -> TransactionBatch:
+    """
+    Return the traffic for config, generating and caching it on first use.
+
+    Generation is seeded by config.SEED, so identical configs produce the same
+    traffic (up to the random tx_ids) and the generator can be skipped on
+    repeat runs. The batch is stored as an uncompressed .npz of its columns.
+
+    Args:
+        config: Configuration used both to generate traffic and as cache key.
+        users: The population generated from config, as User objects or a
+            UserPopulation.
+        cache_dir: Directory holding traffic_<key>.npz files. Defaults to
+            TRAFFIC_CACHE_DIR.
+
+    Returns:
+        TransactionBatch of the generated (or cached) traffic.
+    """
+    cache_path = cache_dir / f"traffic_{traffic_cache_key(config)}.npz"
+    if cache_path.exists():
+        with np.load(cache_path) as cached:
+            return TransactionBatch(
+                tx_ids=cached["tx_ids"].astype(object),
+                timestamps=cached["timestamps"],
+                sender_ids=cached["sender_ids"],
+                receiver_ids=cached["receiver_ids"],
+                amount_sats=cached["amount_sats"],
+                tx_type_codes=cached["tx_type_codes"],
+            )
+
+    batch = TrafficGenerator(config).generate_traffic_batch(users)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    np.savez(
+        cache_path,
+        # Fixed-width strings so the file loads without pickle
+        tx_ids=batch.tx_ids.astype(str),
+        timestamps=batch.timestamps,
+        sender_ids=batch.sender_ids,
+        receiver_ids=batch.receiver_ids,
+        amount_sats=batch.amount_sats,
+        tx_type_codes=batch.tx_type_codes,
+    )
+    return batch
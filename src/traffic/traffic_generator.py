@@ -1,12 +1,43 @@
 """Traffic generation module for L2 Capital Velocity simulation."""
 
-import uuid
-from typing import Dict, List
+import os
+from dataclasses import replace
+from typing import Dict, Iterator, List, Tuple
 
 import numpy as np
 
 from src.config import SECONDS_PER_DAY, SECONDS_PER_HOUR, SimulationConfig
-from src.models import Transaction, TransactionType, User, UserType
+from src.models import (
+    TRANSACTION_TYPE_CODES,
+    USER_TYPE_VALUES,
+    Transaction,
+    TransactionBatch,
+    TransactionType,
+    User,
+    UserPopulation,
+)
+
+# Transactions generated per TransactionBatch by iter_traffic_batches
+TRAFFIC_CHUNK_SIZE: int = 10_000
+
+# Amount clamp range in sats
+MIN_AMOUNT_SATS: int = 100
+MAX_AMOUNT_SATS: int = 10_000_000
+
+# Receiver redraws for internal self-payments before falling back to a uniform pick
+SELF_PAYMENT_RETRIES: int = 10
+
+# Two ASCII hex digits per byte value, so one lookup formats a whole byte
+_HEX_PAIRS: np.ndarray = np.frombuffer(
+    b"".join(f"{byte:02x}".encode() for byte in range(256)), dtype=np.uint16
+)
+
+# (start, stop) hex-digit spans of a UUID's five hyphen-separated groups
+_UUID_GROUPS: Tuple[Tuple[int, int], ...] = ((0, 8), (8, 12), (12, 16), (16, 20), (20, 32))
+
+_INTERNAL_CODE: int = TRANSACTION_TYPE_CODES[TransactionType.INTERNAL]
+_INBOUND_CODE: int = TRANSACTION_TYPE_CODES[TransactionType.EXTERNAL_INBOUND]
+_OUTBOUND_CODE: int = TRANSACTION_TYPE_CODES[TransactionType.EXTERNAL_OUTBOUND]
 
 
 class TrafficGenerator:
@@ -25,7 +56,9 @@ class TrafficGenerator:
         self.rng = np.random.default_rng(config.SEED)
         self._simulation_duration = config.SIMULATION_DAYS * SECONDS_PER_DAY
 
-    def generate_month_of_traffic(self, users: List[User]) -> List[Transaction]:
+    def generate_month_of_traffic(
+        self, users: List[User] | UserPopulation
+    ) -> List[Transaction]:
         """
         Generate a month of synthetic transaction traffic.
 
@@ -34,45 +67,116 @@ class TrafficGenerator:
         for participants.
 
         Args:
-            users: List of User objects to participate in transactions.
+            users: User objects to participate in transactions, or a
+                UserPopulation built once to skip re-scanning them per call.
 
         Returns:
             List of Transaction objects sorted by timestamp.
         """
-        if not users:
-            return []
+        # Object view over the columnar generator, kept for list-based callers
+        return list(self.generate_traffic_batch(users).iter_transactions())
+
+    def generate_traffic_batch(self, users: List[User] | UserPopulation) -> TransactionBatch:
+        """
+        Generate a month of synthetic transaction traffic as one columnar batch.
+
+        Same traffic as iter_traffic_batches for the same seed, but returned
+        whole: the columns are sampled once and no chunks are concatenated.
+        Transaction types are stored as int8 codes; batch.iter_transactions()
+        yields Transaction objects for callers that need them.
+
+        Args:
+            users: User objects to participate in transactions, or a
+                UserPopulation built once to skip re-scanning them per call.
+
+        Returns:
+            TransactionBatch of the month's traffic, in timestamp order.
+        """
+        traffic = self._sample_traffic(users)
+        return replace(traffic, tx_ids=_random_uuid4_strings(len(traffic)))
 
-        # Build user indices by type for efficient selection
-        users_by_type = self._build_user_type_index(users)
+    def iter_traffic_batches(
+        self, users: List[User] | UserPopulation, chunk_size: int = TRAFFIC_CHUNK_SIZE
+    ) -> Iterator[TransactionBatch]:
+        """
+        Generate a month of synthetic transaction traffic in columnar chunks.
 
-        # Generate transaction timestamps using Poisson process with day/night cycle
-        timestamps = self._generate_timestamps()
+        Every column is sampled for the whole month with one NumPy draw, so
+        the traffic does not depend on chunk_size. Only the transaction IDs,
+        the sole per-row Python objects, are created chunk by chunk, and no
+        Transaction objects are created at all.
 
-        transactions: List[Transaction] = []
+        Args:
+            users: User objects to participate in transactions, or a
+                UserPopulation built once to skip re-scanning them per call.
+            chunk_size: Maximum number of transactions per yielded batch.
 
-        for timestamp in timestamps:
-            tx = self._generate_single_transaction(timestamp, users, users_by_type)
-            transactions.append(tx)
+        Yields:
+            TransactionBatch chunks, in timestamp order.
+        """
+        traffic = self._sample_traffic(users)
+        for start in range(0, len(traffic), chunk_size):
+            chunk = traffic[start:start + chunk_size]
+            yield replace(chunk, tx_ids=_random_uuid4_strings(len(chunk)))
+
+    def _sample_traffic(self, users: List[User] | UserPopulation) -> TransactionBatch:
+        """Sample every column but the tx_ids for a month of traffic."""
+        population = UserPopulation.coerce(users)
+        if not len(population):
+            return TransactionBatch.from_transactions([])
+
+        # Participant selection tables, built once per call
+        user_ids = population.user_ids
+        user_type_codes = population.user_type_codes
+        sender_cdf = self._selection_cdf(user_type_codes, self.config.SENDER_WEIGHTS)
+        receiver_cdf = self._selection_cdf(user_type_codes, self.config.RECEIVER_WEIGHTS)
+
+        return self._generate_columns(
+            self._generate_timestamps(), user_ids, sender_cdf, receiver_cdf
+        )
 
-        return transactions
+    def _selection_cdf(
+        self, user_type_codes: np.ndarray, type_weights: Dict[str, float]
+    ) -> np.ndarray:
+        """
+        Cumulative per-user selection probabilities for a set of user type weights.
 
-    def _build_user_type_index(
-        self, users: List[User]
-    ) -> Dict[UserType, List[User]]:
-        """Group users by their type for weighted selection."""
-        users_by_type: Dict[UserType, List[User]] = {
-            user_type: [] for user_type in UserType
-        }
-        for user in users:
-            users_by_type[user.user_type].append(user)
-        return users_by_type
+        Equivalent to picking a user type by weight (among types that have
+        users) and then a user of that type uniformly. Built once per call so
+        draws (see _draw_positions) skip rng.choice's per-call validation and
+        cumsum over every user.
+        """
+        type_counts = np.bincount(user_type_codes, minlength=len(USER_TYPE_VALUES))
+        weights = np.array([type_weights.get(value, 0.0) for value in USER_TYPE_VALUES])
+        weights[type_counts == 0] = 0.0
+
+        # Handle case where all weights are zero
+        if weights.sum() == 0:
+            weights = (type_counts > 0).astype(np.float64)
+
+        per_user = weights[user_type_codes] / type_counts[user_type_codes]
+        cdf = np.cumsum(per_user / per_user.sum())
+        cdf /= cdf[-1]
+        return cdf
+
+    def _draw_positions(self, cdf: np.ndarray, size: int) -> np.ndarray:
+        """
+        Draw size user positions from a selection CDF.
 
-    def _generate_timestamps(self) -> List[float]:
+        Consumes the RNG exactly as rng.choice(len(cdf), size, p=...) does, so
+        the sampled traffic is unchanged.
+        """
+        return np.searchsorted(cdf, self.rng.random(size), side="right")
+
+    def _generate_timestamps(self) -> np.ndarray:
         """
         Generate transaction timestamps using Poisson process with day/night weighting.
 
         Uses thinning (rejection sampling) on a non-homogeneous Poisson process
-        to achieve higher transaction rates during peak hours.
+        to achieve higher transaction rates during peak hours. The candidate
+        process at max_rate is drawn in bulk: a Poisson event count, then that
+        many uniform arrival times, which in sorted order are distributed
+        exactly like exponential inter-arrival gaps.
         """
         # For thinning: we generate at max_rate, then accept with probability p(t)
         # Expected events = max_rate * duration * avg_acceptance
@@ -82,23 +186,18 @@ class TrafficGenerator:
             self._simulation_duration * avg_acceptance
         )
 
-        timestamps: List[float] = []
-        current_time = 0.0
-
-        while current_time < self._simulation_duration:
-            # Generate candidate inter-arrival time using max rate
-            inter_arrival = self.rng.exponential(1.0 / max_rate)
-            current_time += inter_arrival
-
-            if current_time >= self._simulation_duration:
-                break
+        duration = self._simulation_duration
+        candidate_count = self.rng.poisson(max_rate * duration)
+        candidates = np.sort(self.rng.uniform(0.0, duration, size=candidate_count))
 
-            # Accept/reject based on time-varying intensity
-            intensity_ratio = self._get_time_intensity(current_time)
-            if self.rng.random() < intensity_ratio:
-                timestamps.append(current_time)
-
-        return timestamps
+        # Accept/reject based on time-varying intensity: peak hours keep every
+        # candidate, off-peak hours keep 1/PEAK_MULTIPLIER of them
+        hour_of_day = (candidates % SECONDS_PER_DAY) / SECONDS_PER_HOUR
+        is_peak = (hour_of_day >= self.config.PEAK_HOUR_START) & (
+            hour_of_day < self.config.PEAK_HOUR_END
+        )
+        intensity_ratio = np.where(is_peak, 1.0, 1.0 / self.config.PEAK_MULTIPLIER)
+        return candidates[self.rng.random(candidate_count) < intensity_ratio]
 
     def _calculate_average_intensity(self) -> float:
         """Calculate average acceptance probability over a 24-hour cycle."""
@@ -113,147 +212,108 @@ class TrafficGenerator:
         ) / 24
         return avg_acceptance
 
-    def _get_time_intensity(self, timestamp: float) -> float:
+    def _generate_columns(
+        self,
+        timestamps: np.ndarray,
+        user_ids: np.ndarray,
+        sender_cdf: np.ndarray,
+        receiver_cdf: np.ndarray,
+    ) -> TransactionBatch:
         """
-        Get intensity multiplier for a given timestamp.
+        Sample one transaction per timestamp with whole-array RNG draws.
 
-        Returns value between 0 and 1, where 1 = peak rate.
+        Transaction types, amounts and participants are each drawn for all
+        timestamps in a single NumPy call instead of per transaction. The
+        returned tx_ids column is an unfilled placeholder.
         """
-        hour_of_day = (timestamp % SECONDS_PER_DAY) / SECONDS_PER_HOUR
-
-        if self.config.PEAK_HOUR_START <= hour_of_day < self.config.PEAK_HOUR_END:
-            return 1.0  # Peak hours: full intensity
-        else:
-            return 1.0 / self.config.PEAK_MULTIPLIER  # Off-peak: reduced
-
-    def _generate_single_transaction(
-        self,
-        timestamp: float,
-        users: List[User],
-        users_by_type: Dict[UserType, List[User]],
-    ) -> Transaction:
-        """Generate a single transaction at the given timestamp."""
-        tx_type = self._select_transaction_type()
-        amount = self._generate_amount()
-        sender_id, receiver_id = self._select_participants(
-            tx_type, users, users_by_type
+        count = len(timestamps)
+
+        # Internal with INTERNAL_TX_RATIO, otherwise a 50/50 inbound/outbound split
+        is_internal = self.rng.random(count) < self.config.INTERNAL_TX_RATIO
+        is_inbound = ~is_internal & (self.rng.random(count) < 0.5)
+        is_outbound = ~is_internal & ~is_inbound
+        tx_type_codes = np.full(count, _OUTBOUND_CODE, dtype=np.int8)
+        tx_type_codes[is_internal] = _INTERNAL_CODE
+        tx_type_codes[is_inbound] = _INBOUND_CODE
+
+        # Lognormal amounts, clamped to a reasonable range
+        amounts = self.rng.lognormal(
+            mean=self.config.AMOUNT_MU, sigma=self.config.AMOUNT_SIGMA, size=count
         )
-
-        return Transaction(
-            tx_id=str(uuid.uuid4()),
-            timestamp=timestamp,
-            sender_id=sender_id,
-            receiver_id=receiver_id,
-            amount_sats=amount,
-            tx_type=tx_type,
+        amount_sats = np.clip(
+            amounts.astype(np.int64), MIN_AMOUNT_SATS, MAX_AMOUNT_SATS
         )
 
-    def _select_transaction_type(self) -> TransactionType:
-        """Select transaction type based on configured ratios."""
-        if self.rng.random() < self.config.INTERNAL_TX_RATIO:
-            return TransactionType.INTERNAL
-        else:
-            # External: 50/50 split between inbound and outbound
-            if self.rng.random() < 0.5:
-                return TransactionType.EXTERNAL_INBOUND
-            else:
-                return TransactionType.EXTERNAL_OUTBOUND
-
-    def _generate_amount(self) -> int:
-        """Generate transaction amount using lognormal distribution."""
-        amount = self.rng.lognormal(
-            mean=self.config.AMOUNT_MU,
-            sigma=self.config.AMOUNT_SIGMA,
+        # Participants as positions into user_ids, drawn by user type weight
+        sender_pos = self._draw_positions(sender_cdf, count)
+        receiver_pos = self._draw_positions(receiver_cdf, count)
+        self._resolve_self_payments(sender_pos, receiver_pos, is_internal, receiver_cdf)
+
+        sender_ids = user_ids[sender_pos]
+        receiver_ids = user_ids[receiver_pos]
+        sender_ids[is_inbound] = self.EXTERNAL_ENTITY_ID
+        receiver_ids[is_outbound] = self.EXTERNAL_ENTITY_ID
+
+        return TransactionBatch(
+            tx_ids=np.empty(count, dtype=object),
+            timestamps=timestamps,
+            sender_ids=sender_ids,
+            receiver_ids=receiver_ids,
+            amount_sats=amount_sats,
+            tx_type_codes=tx_type_codes,
         )
-        # Clamp to reasonable range: min 100 sats, max 10M sats
-        amount = max(100, min(int(amount), 10_000_000))
-        return amount
 
-    def _select_participants(
+    def _resolve_self_payments(
         self,
-        tx_type: TransactionType,
-        users: List[User],
-        users_by_type: Dict[UserType, List[User]],
-    ) -> tuple[int, int]:
+        sender_pos: np.ndarray,
+        receiver_pos: np.ndarray,
+        is_internal: np.ndarray,
+        receiver_cdf: np.ndarray,
+    ) -> None:
         """
-        Select sender and receiver based on transaction type and user weights.
+        Redraw receivers of internal transactions that picked their own sender.
 
-        Returns:
-            Tuple of (sender_id, receiver_id).
+        Colliding rows are redrawn together (rare with 100+ users); any still
+        colliding after SELF_PAYMENT_RETRIES get a uniformly chosen other user.
+        Modifies receiver_pos in place.
         """
-        if tx_type == TransactionType.EXTERNAL_INBOUND:
-            receiver = self._select_user_weighted(
-                users, users_by_type, self.config.RECEIVER_WEIGHTS
-            )
-            return self.EXTERNAL_ENTITY_ID, receiver.user_id
-
-        elif tx_type == TransactionType.EXTERNAL_OUTBOUND:
-            sender = self._select_user_weighted(
-                users, users_by_type, self.config.SENDER_WEIGHTS
-            )
-            return sender.user_id, self.EXTERNAL_ENTITY_ID
-
-        else:  # INTERNAL
-            sender = self._select_user_weighted(
-                users, users_by_type, self.config.SENDER_WEIGHTS
-            )
-            # Ensure receiver is different from sender
-            receiver = self._select_user_weighted(
-                users, users_by_type, self.config.RECEIVER_WEIGHTS
-            )
-            # Retry if same user selected (rare with 100+ users)
-            attempts = 0
-            while receiver.user_id == sender.user_id and attempts < 10:
-                receiver = self._select_user_weighted(
-                    users, users_by_type, self.config.RECEIVER_WEIGHTS
-                )
-                attempts += 1
-
-            # Fallback: pick any other user
-            if receiver.user_id == sender.user_id:
-                other_users = [u for u in users if u.user_id != sender.user_id]
-                if other_users:
-                    receiver = self.rng.choice(other_users)
-
-            return sender.user_id, receiver.user_id
-
-    def _select_user_weighted(
-        self,
-        users: List[User],
-        users_by_type: Dict[UserType, List[User]],
-        type_weights: Dict[str, float],
-    ) -> User:
-        """
-        Select a user based on user type weights.
-
-        First selects a user type based on weights, then uniformly
-        selects a user of that type.
-        """
-        # Filter to types that have users
-        available_types = [
-            ut for ut in UserType if users_by_type.get(ut)
-        ]
-
-        if not available_types:
-            return self.rng.choice(users)
-
-        # Calculate weights for available types
-        weights = np.array([
-            type_weights.get(ut.value, 0.0) for ut in available_types
-        ])
-
-        # Handle case where all weights are zero
-        if weights.sum() == 0:
-            weights = np.ones(len(available_types))
-
-        weights = weights / weights.sum()
-
-        # Select user type index (use integer index to avoid numpy string conversion)
-        type_idx = self.rng.choice(len(available_types), p=weights)
-        selected_type = available_types[type_idx]
-
-        # Select user from that type
-        user_list = users_by_type[selected_type]
-        user_idx = self.rng.integers(len(user_list))
-        return user_list[user_idx]
-
+        user_count = len(receiver_cdf)
+        collisions = np.flatnonzero(is_internal & (sender_pos == receiver_pos))
+        for _ in range(SELF_PAYMENT_RETRIES):
+            if not collisions.size:
+                return
+            receiver_pos[collisions] = self._draw_positions(receiver_cdf, collisions.size)
+            collisions = collisions[sender_pos[collisions] == receiver_pos[collisions]]
+
+        # Fallback: pick any other user
+        if collisions.size and user_count > 1:
+            offsets = self.rng.integers(1, user_count, size=collisions.size)
+            receiver_pos[collisions] = (sender_pos[collisions] + offsets) % user_count
+
+
+def _random_uuid4_strings(count: int) -> np.ndarray:
+    """
+    Random version-4 UUID strings, formatted in bulk.
+
+    Same entropy source and output as str(uuid.uuid4()), but one os.urandom
+    call and whole-array hex formatting replace count UUID objects.
+
+    Args:
+        count: Number of IDs to generate.
+
+    Returns:
+        Object array of count lowercase, hyphenated UUID strings.
+    """
+    raw = np.frombuffer(os.urandom(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+
+    # Contiguous slice copies per group; scattering digits through a column
+    # index array was the slowest step
+    digits = _HEX_PAIRS[raw].view(np.uint8)
+    chars = np.empty((count, 36), dtype=np.uint8)
+    for group, (start, stop) in enumerate(_UUID_GROUPS):
+        chars[:, start + group:stop + group] = digits[:, start:stop]
+        if group:
+            chars[:, start + group - 1] = ord("-")
+    return chars.view("S36").ravel().astype("U36").astype(object)
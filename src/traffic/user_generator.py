@@ -14,7 +14,9 @@ def generate_users(config: SimulationConfig) -> List[User]:
         config: SimulationConfig containing SEED, TOTAL_USERS, and USER_DISTRIBUTION.
 
     Returns:
-        List of User objects with probabilistically assigned types.
+        List of User objects with probabilistically assigned types. User IDs
+        are the contiguous indices 0..TOTAL_USERS-1, so callers may use them
+        directly as array positions.
     """
     rng = np.random.default_rng(config.SEED)
 
@@ -27,10 +29,9 @@ def generate_users(config: SimulationConfig) -> List[User]:
         p=probabilities,
     )
 
-    users = [
-        User(user_id=i, user_type=UserType(user_types[type_idx]))
-        for i, type_idx in enumerate(type_indices)
-    ]
+    # Resolve each distinct type to its enum member once, then fancy-index
+    members = np.array([UserType(user_type) for user_type in user_types], dtype=object)
+    users = list(map(User, range(config.TOTAL_USERS), members[type_indices].tolist()))
 
     return users
 
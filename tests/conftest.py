@@ -0,0 +1,22 @@
+"""Shared pytest setup."""
+
+from pathlib import Path
+
+import pytest
+
+from main import TRAFFIC_CSV_PATH, save_traffic_csv
+from src.config import SimulationConfig
+from src.models import UserPopulation
+from src.traffic.traffic_generator import TrafficGenerator
+from src.traffic.user_generator import generate_users
+
+
+@pytest.fixture(scope="session", autouse=True)
+def seed_traffic_csv() -> Path:
+    """Generate the default-config seed traffic that main.py writes, if it is missing."""
+    if not TRAFFIC_CSV_PATH.exists():
+        config = SimulationConfig()
+        population = UserPopulation.from_users(generate_users(config))
+        batch = TrafficGenerator(config).generate_traffic_batch(population)
+        save_traffic_csv(batch, TRAFFIC_CSV_PATH)
+    return TRAFFIC_CSV_PATH
@@ -60,6 +60,13 @@ class TestArkEngineInitialization:
         engine = ArkEngine([0])
         assert engine.get_name() == "Ark"
 
+    def test_engine_is_slotted(self) -> None:
+        """Assert engine state lives in __slots__ rather than an instance __dict__."""
+        engine = ArkEngine([0])
+        assert not hasattr(engine, "__dict__")
+        with pytest.raises(AttributeError):
+            engine.unexpected_attribute = 1
+
 
 class TestPoolingAdvantage:
     """Tests demonstrating Ark's pooled liquidity advantage over Legacy."""
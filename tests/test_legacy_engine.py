@@ -1,10 +1,14 @@
 """Tests for the Legacy Lightning Network engine."""
 
+from pathlib import Path
+
+import numpy as np
 import pytest
 
 from src.config import LEGACY_CHANNEL_CAPACITY, LEGACY_INITIAL_SPLIT
 from src.engines.legacy_engine import LegacyEngine
 from src.models import Transaction, TransactionType
+from src.simulation.runner import load_traffic
 
 
 class TestLegacyEngineInitialization:
@@ -63,6 +67,28 @@ class TestLegacyEngineInitialization:
         engine = LegacyEngine([0])
         assert engine.get_name() == "Legacy"
 
+    def test_initialization_from_id_array(self) -> None:
+        """Assert an integer ID array gives the same channels as a list."""
+        from_array = LegacyEngine(np.arange(3, dtype=np.int64))
+        from_list = LegacyEngine([0, 1, 2])
+
+        assert from_array.get_current_tvl() == from_list.get_current_tvl()
+        for user_id in range(3):
+            assert from_array.get_channel_state(user_id) == from_list.get_channel_state(user_id)
+
+    def test_unsorted_duplicate_ids_and_snapshot_state(self) -> None:
+        """Assert IDs are de-duplicated and channel state is returned as a copy."""
+        engine = LegacyEngine([7, 3, 7, 5])
+
+        assert engine.get_total_user_count() == 3
+        assert engine.get_channel_state(4) is None
+
+        state = engine.get_channel_state(7)
+        state["local"] = 0
+        assert engine.get_channel_state(7)["local"] == int(
+            LEGACY_CHANNEL_CAPACITY * LEGACY_INITIAL_SPLIT
+        )
+
 
 class TestExternalOutbound:
     """Tests for external outbound transactions (User -> World)."""
@@ -263,7 +289,7 @@ class TestInternalTransfer:
         bob_id = 1
         amount = 100_000
 
-        # Copy initial values since get_channel_state returns a reference
+        # Read initial values before the transfer
         alice_state = engine_with_users.get_channel_state(alice_id)
         bob_state = engine_with_users.get_channel_state(bob_id)
         alice_initial_remote = alice_state["remote"]
@@ -449,3 +475,18 @@ class TestTVLTracking:
 
         assert engine.get_current_tvl() == initial_tvl - amount
 
+    @pytest.mark.parametrize("use_batch", [False, True])
+    def test_running_tvl_matches_channel_sum(self, use_batch: bool) -> None:
+        """The O(1) running TVL equals a full sum of local balances after mixed traffic."""
+        batch = load_traffic(Path("data/traffic_seed.csv"))
+        user_ids = np.unique(batch.sender_ids[batch.sender_ids >= 0])
+        engine = LegacyEngine(user_ids)
+
+        if use_batch:
+            engine.process_batch(batch)
+        else:
+            for tx in batch.iter_transactions():
+                engine.process_transaction(tx)
+
+        local_sum = sum(engine.get_channel_state(user_id)["local"] for user_id in user_ids.tolist())
+        assert engine.get_current_tvl() == local_sum
@@ -1,7 +1,11 @@
 """Tests for the metrics module."""
 
+import importlib
+
+import numpy as np
 import pytest
 
+from src.analysis import metrics
 from src.analysis.metrics import calculate_btc_days, SECONDS_PER_DAY, SATS_PER_BTC
 
 
@@ -17,6 +21,11 @@ class TestBtcDaysCalculation:
         tvl_history = [(0.0, 1_000_000)]
         assert calculate_btc_days(tvl_history) == 0.0
 
+    def test_zero_tvl_ignores_final_sample(self) -> None:
+        """Zero TVL throughout is 0.0 even if the last sample is nonzero (left sum)."""
+        tvl_history = [(0.0, 0.0), (43200.0, 0.0), (86400.0, 100_000_000)]
+        assert calculate_btc_days(tvl_history) == 0.0
+
     def test_constant_tvl_one_day(self) -> None:
         """1 BTC held for 1 day = 1 BTC-Day."""
         tvl_history = [
@@ -94,3 +103,59 @@ class TestBtcDaysCalculation:
         result = calculate_btc_days(tvl_history)
         assert result == pytest.approx(1.0, rel=1e-9)
 
+    def test_array_input_matches_list(self) -> None:
+        """An (N, 2) array gives the same result as the list of tuples."""
+        tvl_history = [
+            (0.0, SATS_PER_BTC),
+            (SECONDS_PER_DAY, 2 * SATS_PER_BTC),
+            (2 * SECONDS_PER_DAY, 2 * SATS_PER_BTC),
+        ]
+        result = calculate_btc_days(np.array(tvl_history, dtype=np.float64))
+        assert result == pytest.approx(calculate_btc_days(tvl_history), rel=1e-12)
+
+    def test_non_increasing_timestamps_ignored(self) -> None:
+        """Intervals with zero or negative duration contribute nothing."""
+        tvl_history = [
+            (0.0, SATS_PER_BTC),
+            (SECONDS_PER_DAY, 5 * SATS_PER_BTC),
+            (SECONDS_PER_DAY, SATS_PER_BTC),
+            (2 * SECONDS_PER_DAY, SATS_PER_BTC),
+        ]
+        result = calculate_btc_days(tvl_history)
+        assert result == pytest.approx(2.0, rel=1e-9)
+
+    def test_matches_reference_loop(self) -> None:
+        """The vectorized sum equals a step-by-step left Riemann loop."""
+        rng = np.random.default_rng(0)
+        timestamps = np.sort(rng.uniform(0, 30 * SECONDS_PER_DAY, 5_000))
+        tvl = rng.uniform(0, 10 * SATS_PER_BTC, 5_000)
+        tvl_history = list(zip(timestamps.tolist(), tvl.tolist()))
+
+        expected_sat_seconds = 0.0
+        for (t0, tvl0), (t1, _) in zip(tvl_history, tvl_history[1:]):
+            expected_sat_seconds += tvl0 * max(t1 - t0, 0.0)
+        expected = expected_sat_seconds / SATS_PER_BTC / SECONDS_PER_DAY
+
+        assert calculate_btc_days(tvl_history) == pytest.approx(expected, rel=1e-9)
+
+    def test_numba_kernel_matches_numpy(self) -> None:
+        """The optional compiled loop agrees with the NumPy kernel, negative gaps included."""
+        pytest.importorskip("numba")
+        rng = np.random.default_rng(1)
+        timestamps = rng.uniform(0, 30 * SECONDS_PER_DAY, 5_000)  # unsorted
+        tvl = rng.uniform(0, 10 * SATS_PER_BTC, 5_000)
+
+        assert metrics._sat_seconds(timestamps, tvl) == pytest.approx(
+            metrics._sat_seconds_numpy(timestamps, tvl), rel=1e-9
+        )
+
+    def test_disabled_jit_uses_numpy_kernel(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """With numba's JIT disabled, the NumPy kernel is used, not the interpreted loop."""
+        numba = pytest.importorskip("numba")
+        monkeypatch.setattr(numba.config, "DISABLE_JIT", True)
+        try:
+            importlib.reload(metrics)
+            assert metrics._sat_seconds is metrics._sat_seconds_numpy
+        finally:
+            monkeypatch.undo()
+            importlib.reload(metrics)
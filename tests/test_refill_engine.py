@@ -274,6 +274,36 @@ class TestEngineInterface:
         engine = LegacyRefillEngine([0])
         assert engine.get_name() == "LegacyRefill"
 
+    def test_tvl_tracks_channel_local_sum(self) -> None:
+        """Assert the running TVL equals a scan of local balances through refills."""
+        engine = LegacyRefillEngine([0, 1], channel_capacity=1_000_000, initial_split=0.1)
+        transactions = [
+            (TransactionType.EXTERNAL_INBOUND, -1, 0, 300_000),  # triggers a refill
+            (TransactionType.EXTERNAL_OUTBOUND, 1, -1, 200_000),
+            (TransactionType.INTERNAL, 0, 1, 350_000),  # refills receiver channel
+            (TransactionType.EXTERNAL_OUTBOUND, 1, -1, 5_000_000),  # fails
+        ]
+        for i, (tx_type, sender_id, receiver_id, amount) in enumerate(transactions):
+            engine.process_transaction(
+                Transaction(
+                    tx_id=f"tx_{i}",
+                    timestamp=float(i),
+                    sender_id=sender_id,
+                    receiver_id=receiver_id,
+                    amount_sats=amount,
+                    tx_type=tx_type,
+                )
+            )
+            local_sum = sum(engine.get_channel_state(user)["local"] for user in (0, 1))
+            assert engine.get_current_tvl() == local_sum
+
+        assert engine.get_operational_stats()["refill_count"] == 2
+
+    def test_slots_span_hierarchy(self) -> None:
+        """Assert the subclass and LegacyEngine slots leave no instance __dict__."""
+        engine = LegacyRefillEngine([0])
+        assert not hasattr(engine, "__dict__")
+
     def test_operational_stats_structure(self) -> None:
         """Verify operational stats has required keys."""
         engine = LegacyRefillEngine([0])
@@ -1,13 +1,28 @@
 """Tests for the simulation runner."""
 
+import importlib
+from functools import partial
 from pathlib import Path
 
+import numpy as np
 import pytest
 
+from src.analysis.metrics import calculate_btc_days
+from src.engines import _kernels
 from src.engines.abstract_engine import AbstractLSPEngine
+from src.engines.ark_engine import ArkEngine
+from src.engines.legacy_engine import LegacyEngine
+from src.engines.legacy_refill_engine import LegacyRefillEngine
 from src.engines.passthrough_engine import PassthroughEngine
-from src.models import Transaction
-from src.simulation.runner import SimulationResult, SimulationRunner
+from src.models import (
+    TRANSACTION_TYPES,
+    Transaction,
+    TransactionBatch,
+    TransactionType,
+    TVLHistory,
+)
+from src.simulation.parallel import run_engines
+from src.simulation.runner import SimulationResult, SimulationRunner, load_traffic
 
 
 TRAFFIC_CSV_PATH = Path("data/traffic_seed.csv")
@@ -90,6 +105,17 @@ class TestSimulationRunnerHappyPath:
             assert isinstance(timestamp, float), "Timestamp should be a float"
             assert isinstance(tvl, float), "TVL should be a float"
 
+    def test_runner_tvl_history_columns(self, passthrough_runner: SimulationRunner) -> None:
+        """Assert TVL history holds float64 columns aligned with the traffic timestamps."""
+        result = passthrough_runner.run()
+        batch = load_traffic(TRAFFIC_CSV_PATH)
+
+        assert isinstance(result.tvl_history, TVLHistory)
+        assert result.tvl_history.timestamps.dtype == np.float64
+        assert result.tvl_history.tvl.dtype == np.float64
+        np.testing.assert_array_equal(result.tvl_history.timestamps, batch.timestamps)
+        assert len(result.tvl_history.tvl) == len(batch)
+
 
 class TestSimulationRunnerFailureTracking:
     """Tests for failure tracking in simulation runs."""
@@ -135,6 +161,359 @@ class TestSimulationRunnerFailureTracking:
         assert result.total_volume_failed > 0, "Failed volume should be positive"
 
 
+class TestSharedTrafficBatch:
+    """Tests for loading traffic once and sharing it across runners."""
+
+    def test_load_traffic_columns(self) -> None:
+        """Assert load_traffic yields aligned, typed columns."""
+        batch = load_traffic(TRAFFIC_CSV_PATH)
+
+        assert len(batch) > 0
+        for column in (batch.tx_ids, batch.sender_ids, batch.receiver_ids,
+                       batch.amount_sats, batch.tx_type_codes):
+            assert len(column) == len(batch)
+        assert batch.timestamps.dtype.kind == "f"
+        assert batch.amount_sats.dtype.kind == "i"
+        assert batch.tx_type_codes.min() >= 0
+        assert batch.tx_type_codes.max() < len(TRANSACTION_TYPES)
+
+    def test_batch_round_trip(self) -> None:
+        """Assert a batch converts back to the same Transaction objects."""
+        batch = load_traffic(TRAFFIC_CSV_PATH)
+        transactions = list(batch.iter_transactions())
+        rebuilt = TransactionBatch.from_transactions(transactions)
+
+        assert list(rebuilt.iter_transactions()) == transactions
+
+    def test_transactions_are_typed_tuples(self) -> None:
+        """Assert iterated transactions are immutable tuples with enum types."""
+        tx = next(iter(load_traffic(TRAFFIC_CSV_PATH).iter_transactions()))
+
+        assert isinstance(tx, tuple)
+        assert isinstance(tx.tx_type, TransactionType)
+        with pytest.raises(AttributeError):
+            tx.amount_sats = 0
+
+    def test_load_traffic_parquet_matches_csv(self, tmp_path: Path) -> None:
+        """Assert a Parquet copy of the seed traffic loads to the same batch."""
+        pd = pytest.importorskip("pandas")
+        pytest.importorskip("pyarrow")
+        parquet_path = tmp_path / "traffic.parquet"
+        csv_df = pd.read_csv(TRAFFIC_CSV_PATH, float_precision="round_trip")
+        csv_df.to_parquet(parquet_path, index=False)
+
+        from_csv = load_traffic(TRAFFIC_CSV_PATH)
+        from_parquet = load_traffic(parquet_path)
+
+        assert list(from_parquet.iter_transactions()) == list(from_csv.iter_transactions())
+
+    def test_load_traffic_rejects_unknown_tx_type(self, tmp_path: Path) -> None:
+        """Assert a tx_type outside TransactionType fails at the CSV boundary."""
+        csv_path = tmp_path / "traffic.csv"
+        csv_path.write_text(
+            "tx_id,timestamp,sender_id,receiver_id,amount_sats,tx_type\n"
+            "tx_0,1.0,0,1,100,INTERNAL\n"
+            "tx_1,2.0,0,1,100,REFUND\n"
+        )
+
+        with pytest.raises(ValueError, match="Unknown tx_type"):
+            load_traffic(csv_path)
+
+    def test_shared_batch_matches_path(self) -> None:
+        """Assert running from a shared batch matches running from the CSV path."""
+        batch = load_traffic(TRAFFIC_CSV_PATH)
+
+        from_path = SimulationRunner(TRAFFIC_CSV_PATH, MockAlternatingFailureEngine()).run()
+        from_batch = SimulationRunner(batch, MockAlternatingFailureEngine()).run()
+
+        assert from_batch.tx_success_count == from_path.tx_success_count
+        assert from_batch.total_volume_processed == from_path.total_volume_processed
+        assert from_batch.total_volume_failed == from_path.total_volume_failed
+        np.testing.assert_array_equal(from_batch.tvl_history, from_path.tvl_history)
+
+
+class TestBatchProcessing:
+    """Tests for block-wise processing through AbstractLSPEngine.process_batch."""
+
+    def test_passthrough_process_batch(self) -> None:
+        """Assert the vectorized passthrough path accepts everything with flat TVL."""
+        batch = load_traffic(TRAFFIC_CSV_PATH)[:100]
+        success, tvl = PassthroughEngine().process_batch(batch)
+
+        assert success.dtype == bool and success.all()
+        assert len(tvl) == len(batch)
+        assert (tvl == 0.0).all()
+
+    @pytest.mark.parametrize("shuffled", [False, True])
+    @pytest.mark.parametrize("engine_cls", [LegacyEngine, LegacyRefillEngine, ArkEngine])
+    def test_raw_batch_matches_transaction_path(self, engine_cls: type, shuffled: bool) -> None:
+        """Assert the column-fed process_batch matches per-Transaction processing."""
+        batch = load_traffic(TRAFFIC_CSV_PATH)
+        if shuffled:
+            # Out-of-order timestamps must not skip Ark round checks
+            transactions = list(batch.iter_transactions())
+            np.random.default_rng(0).shuffle(transactions)
+            batch = TransactionBatch.from_transactions(transactions)
+        user_ids = np.unique(np.concatenate([batch.sender_ids, batch.receiver_ids]))
+
+        batch_engine = engine_cls(user_ids)
+        success, tvl = batch_engine.process_batch(batch)
+
+        engine = engine_cls(user_ids)
+        expected_success = []
+        expected_tvl = []
+        for tx in batch.iter_transactions():
+            expected_success.append(engine.process_transaction(tx))
+            expected_tvl.append(engine.get_current_tvl())
+        np.testing.assert_array_equal(success, expected_success)
+        np.testing.assert_array_equal(tvl, expected_tvl)
+        assert batch_engine.get_operational_stats() == engine.get_operational_stats()
+        assert not success.all()  # the seed traffic exercises failures too
+
+    @pytest.mark.parametrize(
+        ("engine_cls", "kernel_attr", "loop"),
+        [
+            (LegacyEngine, "src.engines._kernels.legacy_run", _kernels._legacy_loop),
+            (LegacyRefillEngine, "src.engines._kernels.legacy_run", _kernels._legacy_loop),
+            (ArkEngine, "src.engines._kernels.ark_run", _kernels._ark_loop),
+        ],
+    )
+    def test_kernel_loop_matches_transaction_path(
+        self, monkeypatch: pytest.MonkeyPatch, engine_cls: type, kernel_attr: str, loop
+    ) -> None:
+        """Assert the array kernels (run uncompiled here) match per-Transaction processing."""
+        monkeypatch.setattr(kernel_attr, loop)
+        batch = load_traffic(TRAFFIC_CSV_PATH)
+        user_ids = np.unique(np.concatenate([batch.sender_ids, batch.receiver_ids]))
+        user_ids = user_ids[user_ids >= 0]
+
+        # Two blocks, so state written back by the first feeds the second
+        kernel_engine = engine_cls(user_ids)
+        split = len(batch) // 2
+        first_success, first_tvl = kernel_engine.process_batch(batch[:split])
+        second_success, second_tvl = kernel_engine.process_batch(batch[split:])
+
+        engine = engine_cls(user_ids)
+        expected_success = []
+        expected_tvl = []
+        for tx in batch.iter_transactions():
+            expected_success.append(engine.process_transaction(tx))
+            expected_tvl.append(engine.get_current_tvl())
+
+        np.testing.assert_array_equal(
+            np.concatenate([first_success, second_success]), expected_success
+        )
+        np.testing.assert_array_equal(np.concatenate([first_tvl, second_tvl]), expected_tvl)
+        assert kernel_engine.get_current_tvl() == engine.get_current_tvl()
+        assert kernel_engine.get_operational_stats() == engine.get_operational_stats()
+
+    @pytest.mark.parametrize(
+        ("engine_cls", "kernel_attr", "loop"),
+        [
+            (LegacyEngine, "src.engines._kernels.legacy_run", _kernels._legacy_loop),
+            (LegacyRefillEngine, "src.engines._kernels.legacy_run", _kernels._legacy_loop),
+            (ArkEngine, "src.engines._kernels.ark_run", _kernels._ark_loop),
+        ],
+    )
+    def test_overriding_subclass_skips_kernel(
+        self, monkeypatch: pytest.MonkeyPatch, engine_cls: type, kernel_attr: str, loop
+    ) -> None:
+        """Assert a subclass overriding a handler gets the same batch results with a kernel."""
+        monkeypatch.setattr(kernel_attr, loop)
+
+        class RejectInbound(engine_cls):
+            """Engine variant that refuses every inbound payment."""
+
+            def _process_external_inbound(
+                self, sender_id: int, receiver_id: int, amount: int
+            ) -> bool:
+                return False
+
+        batch = load_traffic(TRAFFIC_CSV_PATH)
+        user_ids = np.unique(batch.sender_ids[batch.sender_ids >= 0])
+
+        success, tvl = RejectInbound(user_ids).process_batch(batch)
+
+        engine = RejectInbound(user_ids)
+        expected_success = []
+        expected_tvl = []
+        for tx in batch.iter_transactions():
+            expected_success.append(engine.process_transaction(tx))
+            expected_tvl.append(engine.get_current_tvl())
+        np.testing.assert_array_equal(success, expected_success)
+        np.testing.assert_array_equal(tvl, expected_tvl)
+        inbound_code = TRANSACTION_TYPES.index(TransactionType.EXTERNAL_INBOUND)
+        assert not success[batch.tx_type_codes == inbound_code].any()
+
+    def test_disabled_jit_keeps_per_row_path(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Assert engines do not run the kernels interpreted when numba's JIT is disabled."""
+        numba = pytest.importorskip("numba")
+        monkeypatch.setattr(numba.config, "DISABLE_JIT", True)
+        try:
+            importlib.reload(_kernels)
+            assert _kernels.legacy_run is None
+            assert _kernels.ark_run is None
+        finally:
+            monkeypatch.undo()
+            importlib.reload(_kernels)
+
+    def test_block_size_does_not_change_results(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Assert results are identical when traffic is split across many blocks."""
+        batch = load_traffic(TRAFFIC_CSV_PATH)
+        expected = SimulationRunner(batch, MockAlternatingFailureEngine()).run()
+
+        monkeypatch.setattr("src.simulation.runner.PROCESS_BATCH_SIZE", 7)
+        result = SimulationRunner(batch, MockAlternatingFailureEngine()).run()
+
+        assert result.tx_success_count == expected.tx_success_count
+        assert result.total_volume_processed == expected.total_volume_processed
+        assert result.total_volume_failed == expected.total_volume_failed
+        np.testing.assert_array_equal(result.tvl_history, expected.tvl_history)
+
+    def test_tvl_sample_stride(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Assert a stride keeps every stride-th TVL sample plus the last, across blocks."""
+        batch = load_traffic(TRAFFIC_CSV_PATH)
+        user_ids = np.unique(batch.sender_ids[batch.sender_ids >= 0])
+        full = SimulationRunner(batch, LegacyEngine(user_ids)).run()
+
+        monkeypatch.setattr("src.simulation.runner.PROCESS_BATCH_SIZE", 10)
+        sampled = SimulationRunner(batch, LegacyEngine(user_ids), tvl_sample_stride=7).run()
+
+        expected_rows = np.append(np.arange(0, len(batch), 7), len(batch) - 1)
+        assert (len(batch) - 1) % 7 != 0  # the appended last row is not a duplicate
+        np.testing.assert_array_equal(
+            sampled.tvl_history.timestamps, full.tvl_history.timestamps[expected_rows]
+        )
+        np.testing.assert_array_equal(sampled.tvl_history.tvl, full.tvl_history.tvl[expected_rows])
+        assert sampled.tx_success_count == full.tx_success_count
+        assert sampled.total_volume_processed == full.total_volume_processed
+
+    def test_invalid_tvl_sample_stride(self) -> None:
+        """Assert a stride below 1 is rejected."""
+        with pytest.raises(ValueError):
+            SimulationRunner(TRAFFIC_CSV_PATH, PassthroughEngine(), tvl_sample_stride=0)
+
+    def test_tvl_sample_interval(self) -> None:
+        """Assert time sampling keeps the first row at or past each interval, plus the last."""
+        batch = load_traffic(TRAFFIC_CSV_PATH)
+        user_ids = np.unique(batch.sender_ids[batch.sender_ids >= 0])
+        interval = 3600.0
+        full = SimulationRunner(batch, LegacyEngine(user_ids)).run()
+        sampled = SimulationRunner(
+            batch, LegacyEngine(user_ids), tvl_sample_interval=interval
+        ).run()
+
+        timestamps = batch.timestamps.tolist()
+        expected_rows = []
+        k = 0
+        for row, timestamp in enumerate(timestamps):
+            if timestamp >= timestamps[0] + k * interval:
+                expected_rows.append(row)
+                while timestamps[0] + k * interval <= timestamp:
+                    k += 1
+        if expected_rows[-1] != len(timestamps) - 1:
+            expected_rows.append(len(timestamps) - 1)
+
+        assert 1 < len(sampled.tvl_history) < len(batch)
+        np.testing.assert_array_equal(
+            sampled.tvl_history.timestamps, full.tvl_history.timestamps[expected_rows]
+        )
+        np.testing.assert_array_equal(sampled.tvl_history.tvl, full.tvl_history.tvl[expected_rows])
+
+    @pytest.mark.parametrize("timestamps", [[5.0], [5.0, 5.0, 5.0]])
+    def test_tvl_sample_interval_single_timestamp(self, timestamps: list) -> None:
+        """Assert interval sampling keeps the first and last rows when time does not advance."""
+        traffic = [
+            Transaction(f"tx_{i}", timestamp, -1, 0, 1_000, TransactionType.EXTERNAL_INBOUND)
+            for i, timestamp in enumerate(timestamps)
+        ]
+        result = SimulationRunner(
+            traffic, LegacyEngine([0]), tvl_sample_interval=60.0
+        ).run()
+
+        assert len(result.tvl_history) == min(len(timestamps), 2)
+        assert result.total_transactions == len(timestamps)
+
+    def test_tvl_sample_interval_rejects_unsorted_traffic(self) -> None:
+        """Assert interval sampling refuses traffic that is not in timestamp order."""
+        traffic = [
+            Transaction(f"tx_{i}", timestamp, -1, 0, 1_000, TransactionType.EXTERNAL_INBOUND)
+            for i, timestamp in enumerate([10.0, 5.0])
+        ]
+        runner = SimulationRunner(traffic, LegacyEngine([0]), tvl_sample_interval=60.0)
+
+        with pytest.raises(ValueError, match="sorted"):
+            runner.run()
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"tvl_sample_interval": 0.0}, {"tvl_sample_interval": 60.0, "tvl_sample_stride": 2}],
+    )
+    def test_invalid_tvl_sample_interval(self, kwargs: dict) -> None:
+        """Assert a non-positive interval, or an interval combined with a stride, is rejected."""
+        with pytest.raises(ValueError):
+            SimulationRunner(TRAFFIC_CSV_PATH, PassthroughEngine(), **kwargs)
+
+
+class TestRunEngines:
+    """Tests for running several engines over shared traffic."""
+
+    @pytest.fixture
+    def small_batch(self) -> TransactionBatch:
+        """First few hundred seed transactions, to keep worker start-up cheap."""
+        transactions = list(load_traffic(TRAFFIC_CSV_PATH).iter_transactions())[:500]
+        return TransactionBatch.from_transactions(transactions)
+
+    def test_process_pool_matches_sequential(self, small_batch: TransactionBatch) -> None:
+        """Assert pooled runs match in-process runs and keep the input key order."""
+        user_ids = sorted(set(small_batch.sender_ids.tolist())
+                          | set(small_batch.receiver_ids.tolist()))
+        factories = {
+            "Legacy": partial(LegacyEngine, user_ids),
+            "Passthrough": PassthroughEngine,
+        }
+
+        pooled = run_engines(factories, small_batch, max_workers=2)
+        sequential = run_engines(factories, small_batch, max_workers=1)
+
+        assert list(pooled) == ["Legacy", "Passthrough"]
+        for name in factories:
+            assert pooled[name].engine_name == sequential[name].engine_name
+            assert pooled[name].tx_success_count == sequential[name].tx_success_count
+            np.testing.assert_array_equal(pooled[name].tvl_history, sequential[name].tvl_history)
+
+    def test_results_arrive_with_btc_days_cached(self, small_batch: TransactionBatch) -> None:
+        """Assert btc_days is integrated in the worker and returned with the result."""
+        results = run_engines({"Passthrough": PassthroughEngine}, small_batch, max_workers=2)
+        result = results["Passthrough"]
+
+        assert "btc_days" in vars(result)
+        assert result.btc_days == calculate_btc_days(result.tvl_history)
+
+    def test_transaction_list_matches_batch(self, small_batch: TransactionBatch) -> None:
+        """Assert Transaction objects can be passed in directly, without a file."""
+        transactions = list(small_batch.iter_transactions())
+
+        runner = SimulationRunner(transactions, PassthroughEngine())
+        from_list = runner.run()
+        from_runs = run_engines({"Passthrough": PassthroughEngine}, transactions, max_workers=1)
+
+        assert runner.traffic_file_path is None
+        assert from_list.tx_success_count == len(transactions)
+        assert from_runs["Passthrough"].total_volume_processed == int(small_batch.amount_sats.sum())
+
+    def test_process_pool_loads_path_once(self) -> None:
+        """Assert a CSV path is parsed in the parent and shared with the workers."""
+        factories = {"First": PassthroughEngine, "Second": PassthroughEngine}
+
+        pooled = run_engines(factories, TRAFFIC_CSV_PATH, max_workers=2)
+
+        expected = len(load_traffic(TRAFFIC_CSV_PATH))
+        assert [result.tx_success_count for result in pooled.values()] == [expected, expected]
+
+
 class TestSimulationResult:
     """Tests for SimulationResult dataclass."""
 
@@ -168,3 +547,57 @@ class TestSimulationResult:
         assert result.failure_rate == 1.0
         assert result.total_transactions == 0
 
+    def test_result_tvl_history_stored_as_columns(self) -> None:
+        """Assert (timestamp, tvl) pairs are stored as two float64 columns."""
+        result = SimulationResult(
+            engine_name="Test",
+            total_volume_processed=0,
+            total_volume_failed=0,
+            tx_success_count=0,
+            tx_failure_count=0,
+            tvl_history=[(0.0, 5.0), (60.0, 7.0)],
+        )
+
+        assert isinstance(result.tvl_history, TVLHistory)
+        np.testing.assert_array_equal(result.tvl_history.timestamps, [0.0, 60.0])
+        np.testing.assert_array_equal(result.tvl_history.tvl, [5.0, 7.0])
+        assert result.tvl_history.tvl.dtype == np.float64
+
+    def test_result_btc_days_cached(self) -> None:
+        """Assert btc_days integrates tvl_history once and reuses the value."""
+        result = SimulationResult(
+            engine_name="Test",
+            total_volume_processed=0,
+            total_volume_failed=0,
+            tx_success_count=0,
+            tx_failure_count=0,
+            tvl_history=np.array([[0.0, 100_000_000.0], [86400.0, 0.0]]),
+        )
+
+        assert result.btc_days == pytest.approx(1.0)
+        result.tvl_history = np.empty((0, 2))
+        assert result.btc_days == pytest.approx(1.0)
+
+
+class TestTVLHistory:
+    """Tests for the struct-of-arrays TVL history buffer."""
+
+    def test_append_grows_and_iterates_pairs(self) -> None:
+        """Assert appends past the initial capacity keep every sample in order."""
+        history = TVLHistory(capacity=2)
+        for i in range(100):
+            history.append(float(i), float(10 * i))
+
+        assert len(history) == 100
+        np.testing.assert_array_equal(history.timestamps, np.arange(100.0))
+        np.testing.assert_array_equal(history.tvl, 10 * np.arange(100.0))
+        assert list(history)[:2] == [(0.0, 0.0), (1.0, 10.0)]
+
+    def test_coerce_pairs_and_array(self) -> None:
+        """Assert pairs, (N, 2) arrays and histories all coerce to the same columns."""
+        pairs = [(0.0, 5.0), (60.0, 7.0)]
+        from_pairs = TVLHistory.coerce(pairs)
+
+        assert TVLHistory.coerce(from_pairs) is from_pairs
+        np.testing.assert_array_equal(np.asarray(from_pairs), np.array(pairs))
+        assert len(TVLHistory.coerce([])) == 0
@@ -1,11 +1,17 @@
 """Tests for traffic generation functionality."""
 
+import uuid
 from collections import Counter
+from dataclasses import replace
+from pathlib import Path
 
+import numpy as np
 import pytest
 
 from src.config import SimulationConfig
-from src.models import TransactionType, UserType
+from src.models import TransactionBatch, TransactionType, UserPopulation, UserType
+from src.traffic import traffic_cache
+from src.traffic.traffic_cache import load_or_generate_traffic, traffic_cache_key
 from src.traffic.traffic_generator import TrafficGenerator
 from src.traffic.user_generator import generate_users
 
@@ -80,6 +86,13 @@ class TestTransactionIntegrity:
         tx_ids = [tx.tx_id for tx in transactions]
         assert len(tx_ids) == len(set(tx_ids)), "Duplicate transaction IDs found"
 
+    def test_transaction_ids_are_uuid4(self, transactions) -> None:
+        """Assert bulk-formatted IDs are canonical version-4 UUID strings."""
+        for tx in transactions[:1000]:
+            parsed = uuid.UUID(tx.tx_id)
+            assert parsed.version == 4
+            assert str(parsed) == tx.tx_id
+
     def test_positive_amounts(self, transactions) -> None:
         """Assert all transaction amounts are positive."""
         for tx in transactions:
@@ -211,3 +224,87 @@ class TestDeterminism:
             assert t1.amount_sats == t2.amount_sats, "Amounts differ"
             assert t1.tx_type == t2.tx_type, "Transaction types differ"
 
+
+class TestBatchedGeneration:
+    """Tests for chunked columnar traffic generation."""
+
+    def test_chunks_match_list_generation(
+        self, config: SimulationConfig, users, transactions
+    ) -> None:
+        """Assert concatenated chunks equal the list path for the same seed."""
+        chunks = list(TrafficGenerator(config).iter_traffic_batches(users, chunk_size=1_000))
+        assert all(len(chunk) <= 1_000 for chunk in chunks)
+
+        batched = TransactionBatch.concat(chunks)
+        expected = TransactionBatch.from_transactions(transactions)
+
+        assert len(batched) == len(expected)
+        np.testing.assert_array_equal(batched.timestamps, expected.timestamps)
+        np.testing.assert_array_equal(batched.sender_ids, expected.sender_ids)
+        np.testing.assert_array_equal(batched.receiver_ids, expected.receiver_ids)
+        np.testing.assert_array_equal(batched.amount_sats, expected.amount_sats)
+        np.testing.assert_array_equal(batched.tx_type_codes, expected.tx_type_codes)
+
+    def test_single_batch_matches_chunks(self, config: SimulationConfig, users) -> None:
+        """Assert generate_traffic_batch yields the same columns as the chunked path."""
+        whole = TrafficGenerator(config).generate_traffic_batch(users)
+        chunks = TrafficGenerator(config).iter_traffic_batches(users)
+        chunked = TransactionBatch.concat(list(chunks))
+
+        assert len(whole) == len(chunked)
+        assert whole.tx_type_codes.dtype == np.int8
+        assert len(set(whole.tx_ids.tolist())) == len(whole)
+        np.testing.assert_array_equal(whole.timestamps, chunked.timestamps)
+        np.testing.assert_array_equal(whole.sender_ids, chunked.sender_ids)
+        np.testing.assert_array_equal(whole.receiver_ids, chunked.receiver_ids)
+        np.testing.assert_array_equal(whole.amount_sats, chunked.amount_sats)
+        np.testing.assert_array_equal(whole.tx_type_codes, chunked.tx_type_codes)
+
+    def test_user_population_matches_user_list(self, config: SimulationConfig, users) -> None:
+        """Assert a prebuilt UserPopulation yields the same traffic as the User list."""
+        population = UserPopulation.from_users(users)
+        from_list = TrafficGenerator(config).generate_traffic_batch(users)
+        from_population = TrafficGenerator(config).generate_traffic_batch(population)
+
+        assert len(population) == len(users)
+        np.testing.assert_array_equal(from_population.timestamps, from_list.timestamps)
+        np.testing.assert_array_equal(from_population.sender_ids, from_list.sender_ids)
+        np.testing.assert_array_equal(from_population.receiver_ids, from_list.receiver_ids)
+        np.testing.assert_array_equal(from_population.amount_sats, from_list.amount_sats)
+
+
+class TestTrafficCache:
+    """Tests for the config-keyed on-disk traffic cache."""
+
+    def test_cache_key_tracks_config(self, config: SimulationConfig) -> None:
+        """Assert equal configs share a key and any field change alters it."""
+        assert traffic_cache_key(config) == traffic_cache_key(SimulationConfig())
+
+        reseeded = replace(config, SEED=config.SEED + 1)
+        assert traffic_cache_key(config) != traffic_cache_key(reseeded)
+
+    def test_cache_key_tracks_generator_source(
+        self, config: SimulationConfig, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Assert a change to the generator fingerprint alters the key."""
+        before = traffic_cache_key(config)
+        monkeypatch.setattr(traffic_cache, "_GENERATOR_FINGERPRINT", "edited")
+
+        assert traffic_cache_key(config) != before
+
+    def test_second_load_reads_cache(
+        self, config: SimulationConfig, users, tmp_path: Path
+    ) -> None:
+        """Assert a repeat call returns the cached batch unchanged."""
+        generated = load_or_generate_traffic(config, users, tmp_path)
+        assert len(list(tmp_path.glob("traffic_*.npz"))) == 1
+
+        cached = load_or_generate_traffic(config, users, tmp_path)
+
+        assert cached.tx_ids.dtype == object
+        np.testing.assert_array_equal(cached.tx_ids, generated.tx_ids)
+        np.testing.assert_array_equal(cached.timestamps, generated.timestamps)
+        np.testing.assert_array_equal(cached.sender_ids, generated.sender_ids)
+        np.testing.assert_array_equal(cached.receiver_ids, generated.receiver_ids)
+        np.testing.assert_array_equal(cached.amount_sats, generated.amount_sats)
+        np.testing.assert_array_equal(cached.tx_type_codes, generated.tx_type_codes)